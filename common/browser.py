@@ -1,20 +1,44 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import atexit
+import json
 import logging
 import os
+import shutil
+import threading
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+# Selenium se importa dentro de cada función: los caminos que no abren Chrome
+# (caché, GET directo) no pagan su árbol de imports al arrancar.
+if TYPE_CHECKING:
+    from selenium import webdriver
 
 logger = logging.getLogger(__name__)
 
-def make_driver(headless: bool = True, page_load_timeout: int = None) -> webdriver.Chrome:
+CAPTURE_XHR = os.getenv("SCRAPER_CAPTURE_XHR", "0") == "1"
+
+# Binario de Chrome resuelto una sola vez al importar (CHROME_BIN manda).
+# Si no hay ninguno en PATH, Selenium Manager descarga uno compatible.
+_CHROME_BIN = os.getenv("CHROME_BIN") or next(
+    (p for p in (shutil.which(n) for n in ("google-chrome", "chromium", "chromium-browser")) if p),
+    None,
+)
+
+# Peticiones que nunca aportan al scrape (medios, fuentes, analítica)
+_BLOCKED_URL_PATTERNS = (
+    "*.mp4", "*.webm", "*.mp3",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+)
+
+def make_driver(headless: bool = True, page_load_timeout: int = None, user_data_dir: Optional[str] = None) -> webdriver.Chrome:
     """
     Crea un Chrome para CI (GitHub Actions) usando Selenium Manager.
     No requiere instalar Chrome/Chromedriver manualmente.
+    'user_data_dir' (por defecto SCRAPER_USER_DATA_DIR) fija el perfil; Chrome
+    bloquea un perfil en uso, así que dos drivers vivos no pueden compartirlo.
     
     En CI, los timeouts son más generosos (hasta 3 minutos) porque:
     - Conexión de red del runner es limitada
@@ -26,7 +50,12 @@ def make_driver(headless: bool = True, page_load_timeout: int = None) -> webdriv
     if page_load_timeout is None:
         page_load_timeout = 180 if is_ci else 60  # 3 min en CI, 1 min local
     
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     opts = Options()
+    if _CHROME_BIN:
+        opts.binary_location = _CHROME_BIN
     if headless:
         # Headless moderno (más estable en CI)
         opts.add_argument("--headless=new")
@@ -44,6 +73,34 @@ def make_driver(headless: bool = True, page_load_timeout: int = None) -> webdriv
     )
     opts.add_argument(f"--user-agent={ua}")
 
+    # Perfil persistente opcional: la caché de disco de Chrome sobrevive entre drivers
+    user_data_dir = user_data_dir or os.getenv("SCRAPER_USER_DATA_DIR")
+    if user_data_dir:
+        opts.add_argument(f"--user-data-dir={user_data_dir}")
+    # Solo la caché HTTP (p. ej. en tmpfs): JS/CSS del portal sin re-descargar,
+    # sin arrastrar cookies ni sesión como haría un perfil completo.
+    disk_cache_dir = os.getenv("SCRAPER_DISK_CACHE_DIR")
+    if disk_cache_dir:
+        opts.add_argument(f"--disk-cache-dir={disk_cache_dir}")
+
+    # No descargamos imágenes ni fuentes: solo leemos texto/DOM (SCRAPER_BLOCK_ASSETS=0 para desactivar).
+    # Chrome no tiene preferencia de contenido para fuentes: se bloquean por URL vía CDP.
+    # Las hojas de estilo se mantienen: WebElement.text depende de la visibilidad calculada por CSS.
+    block_assets = os.getenv("SCRAPER_BLOCK_ASSETS", "1") == "1"
+    if block_assets:
+        opts.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+        })
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+
+    # Registro de red (CDP) para descubrir las APIs JSON que usa cada portal
+    if CAPTURE_XHR:
+        opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    # 'eager': driver.get() vuelve en DOMContentLoaded; cada vendor ya espera
+    # explícitamente a su contenido (wait_for_page / WebDriverWait).
+    opts.page_load_strategy = os.getenv("SCRAPER_PAGE_LOAD_STRATEGY", "eager")
+
     driver = webdriver.Chrome(options=opts)  # Selenium Manager resuelve binarios compatibles
     try:
         driver.set_page_load_timeout(page_load_timeout)
@@ -51,6 +108,13 @@ def make_driver(headless: bool = True, page_load_timeout: int = None) -> webdriv
         driver.implicitly_wait(0)
     except Exception:
         pass
+    if block_assets:
+        # Lo que las prefs no cubren (fuentes, vídeo/audio, analítica) se corta vía CDP
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(_BLOCKED_URL_PATTERNS)})
+        except Exception:
+            pass
     
     # Debug logging en CI
     if is_ci:
@@ -58,10 +122,99 @@ def make_driver(headless: bool = True, page_load_timeout: int = None) -> webdriv
     
     return driver
 
+class LazyDriver:
+    """
+    Proxy que solo arranca Chrome (make_driver) al primer uso real. Permite pasar
+    un 'driver' a collect() de vendors que a menudo no lo necesitan (caché,
+    GET directo). Si el arranque falla, el error se recuerda y se relanza.
+    """
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._driver = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def started(self) -> bool:
+        return self._driver is not None
+
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+
+    def _get(self):
+        if self._driver is None:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._driver = make_driver(**self._kwargs)
+            except Exception as e:
+                self._error = e
+                raise
+        return self._driver
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def quit(self) -> None:
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
+
+# Driver compartido del proceso: se reutiliza entre vendors/ejecuciones y se
+# recicla cada DRIVER_MAX_USES usos (acota la memoria de Chrome) o si ha muerto.
+DRIVER_MAX_USES = int(os.getenv("SCRAPER_DRIVER_MAX_USES", "25"))
+_SHARED_DRIVER = None
+_SHARED_USES = 0
+_SHARED_LOCK = threading.Lock()
+
+def driver_alive(driver) -> bool:
+    """True si el Chrome sigue respondiendo (un crash deja la sesión inservible)."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def shared_driver(headless: bool = True) -> webdriver.Chrome:
+    """Devuelve el Chrome compartido, creándolo o reciclándolo si hace falta."""
+    global _SHARED_DRIVER, _SHARED_USES
+    with _SHARED_LOCK:
+        if _SHARED_DRIVER is not None and (
+            _SHARED_USES >= DRIVER_MAX_USES or not driver_alive(_SHARED_DRIVER)
+        ):
+            logger.info("Reciclando Chrome compartido tras %d usos", _SHARED_USES)
+            _quit_quietly(_SHARED_DRIVER)
+            _SHARED_DRIVER = None
+        if _SHARED_DRIVER is None:
+            _SHARED_DRIVER = make_driver(headless=headless)
+            _SHARED_USES = 0
+        _SHARED_USES += 1
+        return _SHARED_DRIVER
+
+def quit_shared_driver() -> None:
+    global _SHARED_DRIVER, _SHARED_USES
+    with _SHARED_LOCK:
+        if _SHARED_DRIVER is not None:
+            _quit_quietly(_SHARED_DRIVER)
+        _SHARED_DRIVER = None
+        _SHARED_USES = 0
+
+def _quit_quietly(driver) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+atexit.register(quit_shared_driver)
+
 def wait_for_page(driver: webdriver.Chrome, timeout: int = 20) -> None:
     """
     Espera a que document.readyState == 'complete'. Tolerante a pequeños fallos.
     """
+    from selenium.webdriver.support.ui import WebDriverWait
+
     try:
         WebDriverWait(driver, timeout).until(
             lambda d: d.execute_script("return document.readyState") == "complete"
@@ -72,10 +225,66 @@ def wait_for_page(driver: webdriver.Chrome, timeout: int = 20) -> None:
     # Pequeño margen para “network idle” aproximado
     time.sleep(0.35)
 
+def wait_for_body_text(driver: webdriver.Chrome, predicate, timeout: float = 20, poll: float = 0.5) -> bool:
+    """
+    Espera (WebDriverWait, sondeo cada 'poll' s) hasta que predicate(texto del body)
+    sea cierto. Devuelve False si expira; nunca lanza.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def _ready(d):
+        try:
+            body = d.find_element(By.TAG_NAME, "body").text
+        except Exception:
+            body = ""
+        return bool(predicate(body))
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll).until(_ready)
+        return True
+    except TimeoutException:
+        return False
+
+def captured_json_responses(driver: webdriver.Chrome, url_contains: str = "") -> List[Tuple[str, Any]]:
+    """
+    Respuestas JSON (XHR/fetch) que la página pidió para construirse, leídas vía
+    CDP del log 'performance'. Requiere SCRAPER_CAPTURE_XHR=1 al crear el driver;
+    si no, devuelve []. Devuelve [(url, json), ...].
+    """
+    if not CAPTURE_XHR:
+        return []
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return []
+    out: List[Tuple[str, Any]] = []
+    for entry in entries:
+        try:
+            msg = json.loads(entry["message"])["message"]
+        except Exception:
+            continue
+        if msg.get("method") != "Network.responseReceived":
+            continue
+        params = msg.get("params") or {}
+        resp = params.get("response") or {}
+        url = resp.get("url") or ""
+        if "json" not in (resp.get("mimeType") or "") or url_contains not in url:
+            continue
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            out.append((url, json.loads(body.get("body") or "null")))
+        except Exception:
+            continue
+    return out
+
 def go(driver: webdriver.Chrome, url: str, timeout: int = 45, wait: bool = True) -> None:
     """
     Navega a una URL con timeout y, si expira, corta la carga con window.stop().
     """
+    from selenium.common.exceptions import TimeoutException
+
     try:
         try:
             driver.set_page_load_timeout(timeout)
@@ -92,7 +301,13 @@ def go(driver: webdriver.Chrome, url: str, timeout: int = 45, wait: bool = True)
 
 __all__ = [
     "make_driver",
+    "LazyDriver",
+    "shared_driver",
+    "quit_shared_driver",
+    "driver_alive",
     "start_driver",     # <- alias para compatibilidad
     "wait_for_page",
+    "wait_for_body_text",
+    "captured_json_responses",
     "go",
 ]
@@ -12,8 +12,15 @@ def ensure_dir(path: str):
         os.makedirs(path, exist_ok=True)
 
 def save_digest_json(path: str, data: Dict[str, Any]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
+    """
+    Escribe el JSON de forma atómica (tmp + os.replace): un proceso que muere a
+    mitad de escritura no deja un fichero truncado para el digest.
+    """
+    ensure_dir(os.path.dirname(path))
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
 
 def mk_skeleton(vendor: str) -> Dict[str, Any]:
     return {
@@ -114,6 +121,10 @@ def _extract_channel_blocks(capture_text: str, prefer: str) -> List[str]:
 
 # ---------------- Deduplicación genérica ----------------
 
+WS_RE = re.compile(r"\s+")
+BLANK_LINES_RE = re.compile(r"(?:\r?\n){2,}")
+TR_CLOSE_RE = re.compile(r"(?i)</tr\s*>")
+
 def _norm_for_dedupe(s: str) -> str:
     """
     Normaliza texto para deduplicación:
@@ -125,7 +136,7 @@ def _norm_for_dedupe(s: str) -> str:
     lines = []
     for ln in s.splitlines():
         ln = ln.replace("\xa0", " ")  # nbsp
-        ln = re.sub(r"\s+", " ", ln.strip())
+        ln = WS_RE.sub(" ", ln.strip())
         lines.append(ln)
     txt = "\n".join(lines).strip()
     return txt.lower()
@@ -142,7 +153,7 @@ def _dedupe_list_of_blocks(blocks: List[str]) -> List[str]:
     return out
 
 def _split_sections(txt: str) -> List[str]:
-    parts = re.split(r"(?:\r?\n){2,}", (txt or "").strip())
+    parts = BLANK_LINES_RE.split((txt or "").strip())
     return [p.strip() for p in parts if p and p.strip()]
 
 def _dedupe_inside_block(txt: str) -> str:
@@ -164,32 +175,38 @@ TAG_NL_RE = re.compile(r"(?is)</?(?:p|div|h[1-6])[^>]*>")
 LI_OPEN_RE = re.compile(r"(?is)<li[^>]*>")
 LI_CLOSE_RE = re.compile(r"(?is)</li\s*>")
 A_TAG_RE = re.compile(r'(?is)<a\b[^>]*?href\s*=\s*"(.*?)"[^>]*>(.*?)</a\s*>')
+ANY_TAG_RE = re.compile(r"(?is)<[^>]+>")
+HSPACE_RE = re.compile(r"[ \t]+")
+MULTI_NL_RE = re.compile(r"\n{3,}")
 
 def _a_to_text(m: re.Match) -> str:
     href = (m.group(1) or "").strip()
-    text = re.sub(r"(?is)<[^>]+>", "", m.group(2) or "").strip()
+    text = ANY_TAG_RE.sub("", m.group(2) or "").strip()
     return f"{text} ({href})" if href else text
 
 def _html_to_text_simple(s: str) -> str:
     if not s:
         return ""
-    # Sustituye etiquetas que implican salto de línea / viñetas
-    s = BR_RE.sub("\n", s)
-    s = TAG_NL_RE.sub("\n", s)
-    s = LI_OPEN_RE.sub("- ", s)
-    s = LI_CLOSE_RE.sub("\n", s)
-    # Enlaces
-    s = A_TAG_RE.sub(_a_to_text, s)
-    # Quita el resto de tags
-    s = re.sub(r"(?is)<[^>]+>", "", s)
+    # Sin '<' ninguna de las pasadas de etiquetas cambia nada (texto plano de
+    # las capturas, el caso habitual): nos las ahorramos.
+    if "<" in s:
+        # Sustituye etiquetas que implican salto de línea / viñetas
+        s = BR_RE.sub("\n", s)
+        s = TAG_NL_RE.sub("\n", s)
+        s = LI_OPEN_RE.sub("- ", s)
+        s = LI_CLOSE_RE.sub("\n", s)
+        # Enlaces
+        s = A_TAG_RE.sub(_a_to_text, s)
+        # Quita el resto de tags
+        s = ANY_TAG_RE.sub("", s)
     # Unescape entidades HTML
     s = html.unescape(s)
     # Normaliza espacios y saltos de línea
     s = s.replace("\r", "")
     # colapsa espacios en blanco dentro de líneas
-    s = "\n".join(re.sub(r"[ \t]+", " ", ln).rstrip() for ln in s.split("\n"))
+    s = "\n".join(HSPACE_RE.sub(" ", ln).rstrip() for ln in s.split("\n"))
     # elimina múltiples saltos en exceso
-    s = re.sub(r"\n{3,}", "\n\n", s)
+    s = MULTI_NL_RE.sub("\n\n", s)
     return s.strip()
 
 def _pretty_vendor_text(vendor: str, txt: str) -> str:
@@ -403,14 +420,14 @@ def _dedupe_table_rows(html_rows: str) -> str:
     """
     if not html_rows:
         return ""
-    parts = re.split(r"(?i)</tr\s*>", html_rows)
+    parts = TR_CLOSE_RE.split(html_rows)
     out_parts: List[str] = []
     seen: set = set()
     for p in parts:
         if not p or not p.strip():
             continue
-        cell_txt = re.sub(r"(?is)<[^>]+>", " ", p)
-        cell_txt = re.sub(r"\s+", " ", cell_txt).strip().lower()
+        cell_txt = ANY_TAG_RE.sub(" ", p)
+        cell_txt = WS_RE.sub(" ", cell_txt).strip().lower()
         if cell_txt in seen:
             continue
         seen.add(cell_txt)
@@ -0,0 +1,55 @@
+# common/http.py
+# -*- coding: utf-8 -*-
+"""
+Sesión HTTP compartida (keep-alive + pool de conexiones) para notificaciones,
+APIs Statuspage y GETs directos de vendors. Reutilizar la sesión evita un
+handshake TCP+TLS por cada petición al mismo host.
+"""
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Dict
+
+# requests (+urllib3, certifi, charset_normalizer) se importa al crear la
+# sesión: los caminos que no envían nada (dry-run, preview) no lo cargan.
+if TYPE_CHECKING:
+    import requests
+
+_SESSIONS: Dict[bool, requests.Session] = {}
+_LOCK = threading.Lock()
+
+def _build_session(retries: bool = True) -> requests.Session:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # Reintentos solo en métodos idempotentes (por defecto de urllib3):
+    # un POST de notificación reintentado podría duplicar el mensaje.
+    # Sin reintentos (sondeos con alternativa, p. ej. el GET previo a Selenium):
+    # un fallo debe pasar al plan B de inmediato, no tras 3 reintentos.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+    ) if retries else Retry(total=0, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retry)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+def get_session(retries: bool = True) -> requests.Session:
+    """
+    Devuelve la sesión del proceso (se crea en el primer uso). retries=False
+    da una sesión aparte sin reintentos, para sondeos que tienen alternativa.
+    """
+    s = _SESSIONS.get(retries)
+    if s is None:
+        with _LOCK:
+            s = _SESSIONS.get(retries)
+            if s is None:
+                s = _SESSIONS[retries] = _build_session(retries)
+    return s
+
+__all__ = ["get_session"]
@@ -3,12 +3,25 @@
 from __future__ import annotations
 
 import os
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Optional
 
+from common.http import get_session
+
 TELEGRAM_API = "https://api.telegram.org/bot{token}/sendMessage"
 
+# Campos fijos de la MessageCard de Teams; send_teams solo añade los dinámicos
+_TEAMS_CARD_SKELETON = {
+    "@type": "MessageCard",
+    "@context": "https://schema.org/extensions",
+    "themeColor": "2B579A",
+}
+
+# Serializa las escrituras de captura (notify_all envía por ambos canales a la vez)
+_CAPTURE_LOCK = threading.Lock()
+
 def _is_truthy_env(name: str) -> bool:
     return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "y", "on")
 
@@ -23,8 +36,9 @@ def _capture_write(channel: str, text: str) -> None:
     os.makedirs(out_dir, exist_ok=True)
     path = os.path.join(out_dir, f"{vendor}.capture.txt")
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(f"\n[{ts}] <{channel}>\n{text}\n")
+    with _CAPTURE_LOCK:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"\n[{ts}] <{channel}>\n{text}\n")
 
 def send_telegram(text: str) -> None:
     # Captura para el digest (si procede)
@@ -42,7 +56,7 @@ def send_telegram(text: str) -> None:
 
     url = TELEGRAM_API.format(token=token)
     try:
-        requests.post(url, json={"chat_id": chat_id, "text": text}, timeout=30)
+        get_session().post(url, json={"chat_id": chat_id, "text": text}, timeout=30)
     except Exception:
         # No propagamos errores de notificación
         pass
@@ -63,18 +77,26 @@ def send_teams(markdown: str, title: Optional[str] = None) -> None:
         return
 
     card = {
-        "@type": "MessageCard",
-        "@context": "https://schema.org/extensions",
+        **_TEAMS_CARD_SKELETON,
         "summary": title or "Status",
-        "themeColor": "2B579A",
         "title": title or "Status",
         "text": markdown,
     }
     try:
-        requests.post(webhook, json=card, timeout=30)
+        get_session().post(webhook, json=card, timeout=30)
     except Exception:
         pass
 
+def notify_all(text: str, title: Optional[str] = None) -> None:
+    """
+    Envía el mismo texto a Telegram y Teams en paralelo: son dos POST
+    independientes y bloqueantes, así la espera total es la del más lento.
+    """
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        futures = [ex.submit(send_telegram, text), ex.submit(send_teams, text, title)]
+    for fut in futures:
+        fut.result()
+
 class Notifier:
     """Compatibilidad con vendors que usan una clase Notifier()."""
     def telegram(self, text: str) -> None:
@@ -1,10 +1,12 @@
 # common/statuspage.py
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import requests, re
+import re
 from datetime import datetime, timezone
 from typing import Dict, List, Any
 
+from common.http import get_session
+
 ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T")
 
 def _now_utc_str():
@@ -24,7 +26,7 @@ def _fmt_utc(s: str) -> str:
 def fetch_summary(base_url: str, timeout: int = 20) -> Dict[str, Any]:
     base = base_url.rstrip("/")
     url = f"{base}/api/v2/summary.json"
-    r = requests.get(url, timeout=timeout, headers={"User-Agent": "dora-bot/1.0"})
+    r = get_session().get(url, timeout=timeout, headers={"User-Agent": "dora-bot/1.0"})
     r.raise_for_status()
     return r.json()
 
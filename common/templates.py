@@ -40,6 +40,8 @@ def render_placeholders(template: str, data: Dict[str, str]) -> str:
     """
     Sustituye {{KEY}} por data['KEY']. Si falta, lo deja tal cual.
     """
+    if "{{" not in template:
+        return template
     def _rep(m):
         key = m.group(1)
         return str(data.get(key, m.group(0)))
@@ -9,9 +9,13 @@ divergencias y usos de datetime.utcnow() (deprecated en Python 3.12+).
 
 from __future__ import annotations
 
+import logging
 import re
+import threading
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 
 def now_utc_str() -> str:
     """Timestamp UTC con sufijo 'UTC', para mensajes y notificaciones."""
@@ -23,11 +27,29 @@ def now_utc_clean() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
 
 
+_WS_RE = re.compile(r"\s+")
+
 def collapse_ws(s: str) -> str:
     """Colapsa secuencias de espacios/saltos a un único espacio."""
-    return re.sub(r"\s+", " ", s or "").strip()
+    return _WS_RE.sub(" ", s or "").strip()
 
 
 def today_utc() -> datetime:
     """Datetime actual en UTC, timezone-aware. Reemplaza datetime.utcnow() (deprecated en 3.12+)."""
     return datetime.now(timezone.utc)
+
+
+def save_page_source(html: str, filename: str) -> None:
+    """
+    Vuelca el HTML de depuración (SAVE_HTML=1) en segundo plano para no
+    retrasar el parseo. Hilo no-daemon: el proceso espera a que termine.
+    """
+    def _write() -> None:
+        try:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(html)
+            logger.debug("💾 HTML guardado en %s", filename)
+        except Exception as e:
+            logger.debug("No se pudo guardar HTML: %s", e)
+
+    threading.Thread(target=_write, name=f"save-{filename}").start()
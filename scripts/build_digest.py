@@ -12,8 +12,8 @@ repo_root = os.path.dirname(script_dir)  # Subir un nivel de scripts/ a raíz
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-from common.browser import make_driver
-from common.notify import send_telegram, send_teams
+from common.browser import shared_driver, quit_shared_driver
+from common.notify import notify_all
 from common.mailer import send_email_smtp
 from common.logger import setup_logging, get_logger
 
@@ -113,18 +113,17 @@ def send_outputs(html_body: str, text_body: str):
     # 1) Email (Gmail SMTP) — usa secrets en GitHub
     subj = f"Daily Vendor Status — {datetime.now(timezone.utc).strftime('%Y-%m-%d')}"
     send_email_smtp(subject=subj, html_body=html_body, text_body=text_body)
-    # 2) Telegram/Teams — digest texto
-    send_telegram(text_body)
-    send_teams(text_body)
+    # 2) Telegram/Teams — digest texto (ambos canales en paralelo)
+    notify_all(text_body)
 
 def main():
     setup_logging()
-    driver = make_driver()
     try:
         vendors_collected = []
         for name, modname in VENDORS.items():
             try:
-                data = collect_from_vendor(modname, driver)
+                # Mismo Chrome para todos; se recrea solo si un vendor lo deja muerto
+                data = collect_from_vendor(modname, shared_driver())
                 # Asegura estructura y nombre visible
                 data["name"] = data.get("name") or name
                 data["component_lines"] = data.get("component_lines") or []
@@ -143,10 +142,7 @@ def main():
         send_outputs(html, text)
         logger.info("Digest generado y enviado.")
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        quit_shared_driver()
 
 if __name__ == "__main__":
     main()
@@ -31,6 +31,7 @@ import argparse
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Tuple
 
+from common.digest_export import save_digest_json
 from common.logger import setup_logging, get_logger
 
 # ---------------------------------------------------------------------------
@@ -69,8 +70,13 @@ UNDER_MAINT_RE = re.compile(r"\bUnder Maintenance\b", re.I)
 # Exclude lines that describe future scheduled maintenance (e.g. Imperva "Scheduled update")
 SCHEDULED_MAINT_RE = re.compile(r"\bScheduled\s+(?:maintenance|update|mantenimiento)\b", re.I)
 
+WS_RE = re.compile(r"\s+")
+COMPONENT_HEADER_RE = re.compile(r"^\s*Component status\s*$", re.I)
+INCIDENTS_HEADER_RE = re.compile(r"^\s*Incidents today\s*$", re.I)
+VENDOR_HEADER_RE = re.compile(r"^===\s+.+\s+===$")
+
 def _collapse(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "")).strip()
+    return WS_RE.sub(" ", (s or "")).strip()
 
 def _read_json(path: str) -> Dict[str, Any]:
     try:
@@ -146,7 +152,7 @@ def build_vendor_block(v: Dict[str, Any]) -> str:
     out.append("")
 
     # Component status
-    has_comp_header = any(re.search(r"^\s*Component status\s*$", ln, re.I) for ln in comp_lines)
+    has_comp_header = any(COMPONENT_HEADER_RE.search(ln) for ln in comp_lines)
     if not has_comp_header:
         out.append("Component status")
     if comp_lines:
@@ -160,7 +166,7 @@ def build_vendor_block(v: Dict[str, Any]) -> str:
 
     # Incidents today
     out.append("")
-    has_inc_header = any(re.search(r"^\s*Incidents today\s*$", ln, re.I) for ln in inc_lines)
+    has_inc_header = any(INCIDENTS_HEADER_RE.search(ln) for ln in inc_lines)
     if not has_inc_header:
         out.append("Incidents today")
     if inc_lines:
@@ -270,7 +276,7 @@ def build_vendor_html_block(v: Dict[str, Any]) -> str:
     html_lines = []
     for line in text.split("\n"):
         stripped = line.strip()
-        if re.match(r"^===\s+.+\s+===$", stripped):
+        if VENDOR_HEADER_RE.match(stripped):
             html_lines.append(
                 f'<strong style="color:#000000; font-weight:700; font-size:14px;">{_html_lib.escape(stripped)}</strong>'
             )
@@ -360,9 +366,7 @@ def main():
     }
 
     # 7) Escribir salida
-    os.makedirs(os.path.dirname(args.out), exist_ok=True)
-    with open(args.out, "w", encoding="utf-8") as f:
-        json.dump(out_data, f, ensure_ascii=False, indent=2)
+    save_digest_json(args.out, out_data)
 
     logger.info("OK → %s (%d vendors)", args.out, len(vendors))
 
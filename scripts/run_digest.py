@@ -4,14 +4,15 @@
 import os
 import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, Optional, List, Tuple
 import re
-import requests
 # Importar config para obtener datos del cliente
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from common.config import ClientConfig
+from common.http import get_session
 from common.logger import setup_logging, get_logger
 from common.templates import (
     load_text_template,
@@ -38,48 +39,57 @@ def load_data(path: Optional[str]) -> Dict[str, str]:
     return {k: ("" if v is None else str(v)) for k, v in data.items()}
 
 def _saludo_linea(now_utc: datetime) -> str:
-    h = int(now_utc.strftime("%H"))
+    h = now_utc.hour
     if 6 <= h < 12:
         return "Buenos días,"
     if 12 <= h < 20:
         return "Buenas tardes,"
     return "Buenas noches,"
 
+# Claves que las plantillas esperan siempre (vacías si el digest no las trae)
+_DEFAULT_KEYS = (
+    "NUM_PROVEEDORES",
+    "INC_NUEVOS_HOY",
+    "INC_ACTIVOS",
+    "INC_RESUELTOS_HOY",
+    "MANTENIMIENTOS_HOY",
+    "OBS_CLAVE",
+    "FILAS_INCIDENTES_HOY",
+    "FILAS_INCIDENTES_15D",
+    "LISTA_FUENTES_CON_ENLACES",
+    "LISTA_FUENTES_TXT",
+    "FIRMA_HTML",
+    "TABLA_INCIDENTES_HOY",
+    "TABLA_INCIDENTES_15D",
+    "NOMBRE_CONTACTO",
+    "ENLACE_O_REFERENCIA_INTERNA",
+    "ENLACE_O_TEXTO_CRITERIOS",
+    "IMPACTO_CLIENTE_SI_NO",
+    "ACCION_SUGERIDA",
+    "FECHA_SIGUIENTE_REPORTE",
+    "DETALLES_POR_VENDOR_TEXTO",
+    "DETALLES_POR_VENDOR_HTML",
+)
+
 def inject_defaults(data: Dict[str, str]) -> Dict[str, str]:
+    """Copia de 'data' completada con los valores por defecto (lo que trae 'data' manda)."""
     now_utc = datetime.now(timezone.utc)
-    defaults = {
-        "FECHA_UTC": now_utc.strftime("%Y-%m-%d"),
-        "HORA_MUESTREO_UTC": now_utc.strftime("%H:%M"),
-        "VENTANA_UTC": f"{(now_utc.replace(hour=0, minute=0, second=0, microsecond=0)).strftime('%Y-%m-%d 00:00')}–{now_utc.strftime('%Y-%m-%d %H:%M')}",
-        "NUM_PROVEEDORES": data.get("NUM_PROVEEDORES", ""),
-        "INC_NUEVOS_HOY": data.get("INC_NUEVOS_HOY", ""),
-        "INC_ACTIVOS": data.get("INC_ACTIVOS", ""),
-        "INC_RESUELTOS_HOY": data.get("INC_RESUELTOS_HOY", ""),
-        "MANTENIMIENTOS_HOY": data.get("MANTENIMIENTOS_HOY", ""),
-        "OBS_CLAVE": data.get("OBS_CLAVE", ""),
-        "FILAS_INCIDENTES_HOY": data.get("FILAS_INCIDENTES_HOY", ""),
-        "FILAS_INCIDENTES_15D": data.get("FILAS_INCIDENTES_15D", ""),
-        "LISTA_FUENTES_CON_ENLACES": data.get("LISTA_FUENTES_CON_ENLACES", ""),
-        "LISTA_FUENTES_TXT": data.get("LISTA_FUENTES_TXT", ""),
-        "FIRMA_HTML": data.get("FIRMA_HTML", ""),
-        "TABLA_INCIDENTES_HOY": data.get("TABLA_INCIDENTES_HOY", ""),
-        "TABLA_INCIDENTES_15D": data.get("TABLA_INCIDENTES_15D", ""),
-        "NOMBRE_CONTACTO": data.get("NOMBRE_CONTACTO", ""),
-        "ENLACE_O_REFERENCIA_INTERNA": data.get("ENLACE_O_REFERENCIA_INTERNA", ""),
-        "ENLACE_O_TEXTO_CRITERIOS": data.get("ENLACE_O_TEXTO_CRITERIOS", ""),
-        "IMPACTO_CLIENTE_SI_NO": data.get("IMPACTO_CLIENTE_SI_NO", ""),
-        "ACCION_SUGERIDA": data.get("ACCION_SUGERIDA", ""),
-        "FECHA_SIGUIENTE_REPORTE": data.get("FECHA_SIGUIENTE_REPORTE", ""),
-        "DETALLES_POR_VENDOR_TEXTO": data.get("DETALLES_POR_VENDOR_TEXTO", ""),
-        "DETALLES_POR_VENDOR_HTML": data.get("DETALLES_POR_VENDOR_HTML", ""),
-        "SALUDO_LINEA": data.get("SALUDO_LINEA") or _saludo_linea(now_utc),
-    }
+    stamp = now_utc.strftime("%Y-%m-%d %H:%M")  # fecha = [:10], hora = [11:]
+    out = dict(data)
+    out.setdefault("FECHA_UTC", stamp[:10])
+    out.setdefault("HORA_MUESTREO_UTC", stamp[11:])
+    out.setdefault("VENTANA_UTC", f"{stamp[:10]} 00:00–{stamp}")
+    for key in _DEFAULT_KEYS:
+        out.setdefault(key, "")
+    if "SALUDO_LINEA" not in out:
+        out["SALUDO_LINEA"] = _saludo_linea(now_utc)
     # Confidencial line: only render if the variable has a value
-    conf_footer = data.get("EMAIL_CONFIDENTIAL_FOOTER", "").strip()
-    defaults["CONFIDENCIAL_LINEA_HTML"] = (
-        f"<strong>Confidencial:</strong> {conf_footer}<br>" if conf_footer else ""
-    )
-    return {**defaults, **data}
+    if "CONFIDENCIAL_LINEA_HTML" not in out:
+        conf_footer = data.get("EMAIL_CONFIDENTIAL_FOOTER", "").strip()
+        out["CONFIDENCIAL_LINEA_HTML"] = (
+            f"<strong>Confidencial:</strong> {conf_footer}<br>" if conf_footer else ""
+        )
+    return out
 
 # ---------------- Senders (honran DRY-RUN) ----------------
 
@@ -96,7 +106,7 @@ def send_telegram(markdown: str, subject: Optional[str], dry_run: bool) -> None:
     chat_id = env_or_raise("TELEGRAM_USER_ID")
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     for chunk in chunk_text(markdown, limit=3900):
-        r = requests.post(url, json={"chat_id": chat_id, "text": chunk}, timeout=30)
+        r = get_session().post(url, json={"chat_id": chat_id, "text": chunk}, timeout=30)
         if r.status_code != 200:
             msg = r.text
             if len(msg) > 600:
@@ -196,7 +206,7 @@ def send_teams(html: str, teams_html: str, subject: str, dry_run: bool) -> None:
         "html":       html,
         "teams_html": teams_html,
     }
-    r = requests.post(webhook, json=payload, timeout=60)
+    r = get_session().post(webhook, json=payload, timeout=60)
     if r.status_code >= 300:
         msg = r.text
         if len(msg) > 600:
@@ -242,12 +252,6 @@ def main():
     text_subject, text_body_tpl = load_text_template(args.text_template)
     html_subject, html_tpl = load_html_template(args.html_template)
 
-    text_body = render_placeholders(text_body_tpl, data)
-    html_body = render_placeholders(html_tpl, data)
-    # Renderizar el subject también (no solo text_body y html_body)
-    subject = render_placeholders(data.get("SUBJECT") or text_subject or html_subject or "DORA Daily Digest", data)
-    html_block = wrap_codeblock("html", html_body)
-
     # DRY-RUN si preview_out o env NOTIFY_DRY_RUN
     dry_run = bool(args.preview_out) or is_truthy_env("NOTIFY_DRY_RUN")
 
@@ -258,31 +262,43 @@ def main():
     if "none" in selected:
         selected = set()
 
+    # Solo se renderiza lo que algún destino usa: Telegram el texto, Teams el
+    # HTML y la previsualización ambos.
+    text_body = render_placeholders(text_body_tpl, data) if dry_run or "telegram" in selected else ""
+    html_body = render_placeholders(html_tpl, data) if dry_run or "teams" in selected else ""
+    # Renderizar el subject también (no solo text_body y html_body)
+    subject = render_placeholders(data.get("SUBJECT") or text_subject or html_subject or "DORA Daily Digest", data)
+
     # Previsualización (no envío)
     if dry_run:
         preview_dir = args.preview_out or ".github/out/preview"
         # Siempre guardamos el cuerpo TXT (como estaba), y añadimos el HTML real.
-        write_preview(preview_dir, subject, html_block, html_body, text_body)
+        write_preview(preview_dir, subject, wrap_codeblock("html", html_body), html_body, text_body)
         logger.info("Previsualizaci\u00f3n escrita en: %s", preview_dir)
         return
 
-    errors: List[str] = []
-
-    # Telegram → SOLO versión texto (como acordado)
-    if "telegram" in selected:
-        try:
-            for chunk in chunk_text(f"{subject}\n\n{text_body}", limit=3900):
-                send_telegram(chunk, subject=subject, dry_run=False)
-        except Exception as e:
-            errors.append(f"Telegram: {e}")
+    # Telegram → SOLO versión texto (como acordado). send_telegram ya trocea:
+    # los chunks salen en orden, de uno en uno, por la misma conexión keep-alive.
+    def _send_telegram() -> None:
+        send_telegram(f"{subject}\n\n{text_body}", subject=subject, dry_run=False)
 
     # Teams → Power Automate envía el HTML por email al cliente y notifica al SOC en Teams
-    if "teams" in selected:
-        try:
-            teams_html = _simplify_html_for_teams(html_body)
-            send_teams(html_body, teams_html=teams_html, subject=subject, dry_run=False)
-        except Exception as e:
-            errors.append(f"Teams: {e}")
+    def _send_teams() -> None:
+        teams_html = _simplify_html_for_teams(html_body)
+        send_teams(html_body, teams_html=teams_html, subject=subject, dry_run=False)
+
+    # Canales independientes: se envían en paralelo (los chunks de Telegram siguen en orden)
+    senders = [(name, fn) for name, fn in (("Telegram", _send_telegram), ("Teams", _send_teams))
+               if name.lower() in selected]
+    errors: List[str] = []
+    if senders:
+        with ThreadPoolExecutor(max_workers=len(senders)) as ex:
+            futures = [(name, ex.submit(fn)) for name, fn in senders]
+        for name, fut in futures:
+            try:
+                fut.result()
+            except Exception as e:
+                errors.append(f"{name}: {e}")
 
     if errors:
         raise SystemExit(" | ".join(errors))
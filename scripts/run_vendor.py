@@ -5,6 +5,8 @@ import os
 import sys
 import argparse
 import importlib
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 # Fix sys.path para encontrar módulos desde cualquier ubicación
 # Cuando se ejecuta scripts/run_vendor.py, Python necesita poder importar 'common'
@@ -14,65 +16,57 @@ if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
 # Arranque Selenium
-from common.browser import make_driver
+from common.browser import LazyDriver, driver_alive
 from common.logger import setup_logging, get_logger
 from common.utils import now_utc_str
-from bs4 import BeautifulSoup  # por si algún vendor lo usa internamente
 
 logger = get_logger(__name__)
 
-def main():
-    setup_logging()
-    ap = argparse.ArgumentParser(description="Run single vendor or export JSON for digest")
-    ap.add_argument("--vendor", required=True, help="nombre del vendor (slug): aruba, cyberark, ...")
-    ap.add_argument("--export-json", help="ruta de salida JSON con resumen para digest")
-    ap.add_argument("--headless", action="store_true", default=True)
-    args = ap.parse_args()
+# Hilos (y, como mucho, Chromes) en modo --vendors
+BATCH_WORKERS = int(os.getenv("SCRAPER_BATCH_WORKERS", "4"))
 
-    slug = args.vendor.strip().lower()
+def collect_vendor(slug: str, driver) -> dict:
+    """
+    collect() del vendor → fallback común → mínimo. Siempre devuelve un dict
+    normalizado (component_lines / incidents_lines como listas).
+    """
     data = None
-    driver = None
 
-    # Arrancar el browser — si falla, continuamos sin driver (llegamos al fallback mínimo)
+    # Cargar módulo del vendor
+    mod = None
     try:
-        driver = make_driver(headless=args.headless)
+        mod = importlib.import_module(f"vendors.{slug}")
     except Exception as exc:
-        logger.exception("[%s] make_driver() falló: %s", slug, exc)
+        logger.exception("[%s] No se pudo importar vendors.%s: %s", slug, slug, exc)
 
-    if driver is not None:
-        # Cargar módulo del vendor
-        mod = None
+    # 1) Intentar collect() nativo del vendor
+    if mod is not None:
         try:
-            mod = importlib.import_module(f"vendors.{slug}")
+            if hasattr(mod, "collect") and callable(getattr(mod, "collect")):
+                data = mod.collect(driver)  # debe devolver dict estándar
         except Exception as exc:
-            logger.exception("[%s] No se pudo importar vendors.%s: %s", slug, slug, exc)
-
-        # 1) Intentar collect() nativo del vendor
-        if mod is not None:
-            try:
-                if hasattr(mod, "collect") and callable(getattr(mod, "collect")):
-                    data = mod.collect(driver)  # debe devolver dict estándar
-            except Exception as exc:
-                logger.exception("[%s] collect() falló: %s", slug, exc)
-                data = None
-
-        # 2) Fallback common
-        if data is None:
-            try:
-                from common.fallback_collectors import get_collector
-                fn = get_collector(slug)
-            except Exception:
-                fn = None
-            if fn:
-                try:
-                    data = fn(driver)
-                except Exception:
-                    data = None
-
+            logger.exception("[%s] collect() falló: %s", slug, exc)
+            data = None
+
+    # Chrome no arrancó: como cuando make_driver() fallaba antes de collect(),
+    # ni el resultado ni el fallback común (que en algunos vendors devuelve un
+    # "sin incidentes" fijo con overall_ok=True) valen; vamos al mínimo.
+    if driver.failed:
+        logger.error("[%s] Chrome no arrancó; se omiten collect() y el fallback", slug)
+        data = None
+
+    # 2) Fallback common
+    if data is None and not driver.failed:
         try:
-            driver.quit()
+            from common.fallback_collectors import get_collector
+            fn = get_collector(slug)
         except Exception:
-            pass  # browser puede haberse colgado o crasheado; no bloquear la escritura del JSON
+            fn = None
+        if fn:
+            try:
+                data = fn(driver)
+            except Exception:
+                data = None
 
     # 3) Último recurso: mínimo — siempre producimos un JSON válido
     if not isinstance(data, dict):
@@ -95,15 +89,14 @@ def main():
 
     data.setdefault("name", slug.title())
     data.setdefault("timestamp_utc", now_utc_str())
+    return data
 
+def emit(slug: str, data: dict, export_json: str = None) -> None:
     # Export JSON si lo piden
-    if args.export_json:
-        import json
-        out = args.export_json
-        os.makedirs(os.path.dirname(out), exist_ok=True)
-        with open(out, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        logger.info("[%s] JSON escrito en %s", slug, out)
+    if export_json:
+        from common.digest_export import save_digest_json
+        save_digest_json(export_json, data)
+        logger.info("[%s] JSON escrito en %s", slug, export_json)
     else:
         # Camino "run" clásico: pequeño resumen a stdout (no notifica)
         logger.info("[%s] %s UTC", data.get('name'), data.get('timestamp_utc'))
@@ -112,5 +105,123 @@ def main():
         for ln in (data.get("incidents_lines") or []):
             logger.info(ln)
 
+def _quit(driver) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass  # browser puede haberse colgado o crasheado; no bloquear la escritura del JSON
+
+def run_batch(slugs, export_dir: str = None, headless: bool = True) -> None:
+    """
+    Varios vendors en un solo proceso: imports y Chrome se pagan una vez.
+    Cada hilo toma un LazyDriver de la cola (un Chrome nunca se comparte entre
+    hilos) y lo devuelve al terminar, así el siguiente vendor reutiliza el
+    navegador ya arrancado. Los drivers siguen siendo perezosos: un vendor
+    resuelto por caché/GET no arranca Chrome.
+
+    Los vendors corren a la vez en hilos distintos. Se asume que sus módulos no
+    guardan estado mutable a nivel de módulo más allá de constantes y cachés
+    lru_cache (seguras entre hilos); un vendor que lo necesite debe protegerlo.
+    Con SCRAPER_USER_DATA_DIR cada hueco del pool usa su propio subdirectorio
+    (worker-N): Chrome no abre un perfil que ya tiene bloqueado otro proceso.
+    """
+    workers = max(1, min(BATCH_WORKERS, len(slugs)))
+    base_profile = os.getenv("SCRAPER_USER_DATA_DIR")
+
+    def _new_driver(slot: int) -> LazyDriver:
+        profile = os.path.join(base_profile, f"worker-{slot}") if base_profile else None
+        return LazyDriver(headless=headless, user_data_dir=profile)
+
+    pool: "queue.Queue[tuple]" = queue.Queue()
+    for slot in range(workers):
+        pool.put((slot, _new_driver(slot)))
+
+    def _one(slug: str) -> None:
+        slot, driver = pool.get()
+        try:
+            data = collect_vendor(slug, driver)
+        finally:
+            if driver.failed or (driver.started and not driver_alive(driver)):
+                # Chrome caído o sin arrancar: el siguiente vendor usa uno nuevo
+                _quit(driver)
+                driver = _new_driver(slot)
+            pool.put((slot, driver))
+        out = os.path.join(export_dir, f"{slug}.json") if export_dir else None
+        emit(slug, data, out)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for slug, fut in [(s, ex.submit(_one, s)) for s in slugs]:
+                try:
+                    fut.result()
+                except Exception as exc:
+                    logger.exception("[%s] Falló en modo batch: %s", slug, exc)
+    finally:
+        while not pool.empty():
+            _quit(pool.get_nowait()[1])
+
+def run_daemon(stream, export_dir: str = None, headless: bool = True) -> None:
+    """
+    Proceso de larga vida: lee un slug por línea de 'stream' (stdin) hasta EOF
+    y lo despacha contra el mismo LazyDriver. Imports y Chrome se pagan una
+    sola vez aunque el llamador vaya encolando vendors poco a poco.
+    """
+    driver = LazyDriver(headless=headless)
+    try:
+        for line in stream:
+            slug = line.strip().lower()
+            if not slug or slug.startswith("#"):
+                continue
+            try:
+                data = collect_vendor(slug, driver)
+                out = os.path.join(export_dir, f"{slug}.json") if export_dir else None
+                emit(slug, data, out)
+            except Exception as exc:
+                logger.exception("[%s] Falló en modo daemon: %s", slug, exc)
+            if driver.failed or (driver.started and not driver_alive(driver)):
+                # Chrome caído o sin arrancar: el siguiente vendor usa uno nuevo
+                _quit(driver)
+                driver = LazyDriver(headless=headless)
+    finally:
+        _quit(driver)
+
+def main():
+    setup_logging()
+    ap = argparse.ArgumentParser(description="Run single vendor or export JSON for digest")
+    grp = ap.add_mutually_exclusive_group(required=True)
+    grp.add_argument("--vendor", help="nombre del vendor (slug): aruba, cyberark, ...")
+    grp.add_argument("--vendors", help="varios slugs separados por comas (un solo proceso, pool de drivers)")
+    grp.add_argument("--daemon", action="store_true", help="lee slugs de stdin (uno por línea) con un Chrome reutilizado")
+    ap.add_argument("--export-json", help="ruta de salida JSON con resumen para digest")
+    ap.add_argument("--export-dir", help="con --vendors/--daemon: directorio donde escribir <vendor>.json")
+    ap.add_argument("--headless", action="store_true", default=True)
+    args = ap.parse_args()
+    if args.export_json and (args.vendors or args.daemon):
+        ap.error("--export-json solo vale con --vendor; con --vendors/--daemon usa --export-dir")
+
+    if args.daemon:
+        run_daemon(sys.stdin, export_dir=args.export_dir, headless=args.headless)
+        return
+
+    if args.vendors:
+        slugs = [s.strip().lower() for s in args.vendors.split(",") if s.strip()]
+        run_batch(slugs, export_dir=args.export_dir, headless=args.headless)
+        return
+
+    slug = args.vendor.strip().lower()
+
+    # Chrome solo arranca si el vendor lo usa de verdad (p. ej. Netskope puede
+    # resolverse con caché o un GET directo). Si el arranque falla, collect()
+    # y el fallback fallan y llegamos al mínimo.
+    driver = LazyDriver(headless=args.headless)
+    try:
+        data = collect_vendor(slug, driver)
+        if not driver.started and not driver.failed:
+            logger.info("[%s] Resuelto sin arrancar Chrome", slug)
+    finally:
+        _quit(driver)
+
+    emit(slug, data, args.export_json)
+
 if __name__ == "__main__":
     main()
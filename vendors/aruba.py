@@ -12,7 +12,6 @@ Así conservas toda la depuración previa y el digest recibe datos correctos.
 import logging
 import os
 import re
-import time
 from datetime import datetime, timezone
 
 from bs4 import BeautifulSoup
@@ -21,9 +20,9 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 # Camino legacy de notificación
-from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws
+from common.browser import make_driver, wait_for_body_text
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -47,19 +46,14 @@ NO_INCIDENTS_TODAY_RE = re.compile(r"No incidents reported today", re.I)
 def wait_for_page(driver):
     WebDriverWait(driver, 25).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
     # Espera a que aparezca sección de componentes o texto de incidentes
-    for _ in range(40):
-        try:
-            body = driver.find_element(By.TAG_NAME, "body").text
-        except Exception:
-            body = ""
+    def ready(body):
         text = collapse_ws(body)
-        if ("components" in text.lower()
+        return ("components" in text.lower()
             or "incidents" in text.lower()
             or NO_INCIDENTS_TODAY_RE.search(text)
             or OPERATIONAL_RE.search(text)
-            or ISSUE_STATUS_RE.search(text)):
-            return
-        time.sleep(0.5)
+            or ISSUE_STATUS_RE.search(text))
+    wait_for_body_text(driver, ready, timeout=20, poll=0.5)
 
 def parse_components(soup: BeautifulSoup):
     """
@@ -196,11 +190,7 @@ def collect(driver):
         wait_for_page(driver)
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("aruba_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-            except Exception:
-                pass
+            save_page_source(html, "aruba_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
         comps = parse_components(soup)
@@ -265,12 +255,7 @@ def run():
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("aruba_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-                logger.debug("💾 HTML guardado en aruba_page_source.html")
-            except Exception as e:
-                logger.debug("No se pudo guardar HTML: %s", e)
+            save_page_source(html, "aruba_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
         comps = parse_components(soup)
@@ -280,8 +265,7 @@ def run():
         logger.info("===== ARUBA =====\n%s\n=================", msg)
 
         # Notificaciones legacy
-        send_telegram(msg)
-        send_teams(msg)
+        notify_all(msg)
 
     except Exception as e:
         logger.exception("ERROR: %s", e)
@@ -18,7 +18,6 @@ Salida normalizada para el digest:
 import logging
 import os
 import re
-import time
 from datetime import datetime, timezone
 
 from bs4 import BeautifulSoup
@@ -27,9 +26,9 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 # Notificaciones legacy (solo en run())
-from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc
+from common.browser import make_driver, wait_for_body_text
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -51,19 +50,14 @@ NO_INCIDENTS_TODAY_RE = re.compile(r"No incidents reported today", re.I)
 
 def wait_for_page(driver):
     WebDriverWait(driver, 25).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-    for _ in range(40):
-        try:
-            body = driver.find_element(By.TAG_NAME, "body").text
-        except Exception:
-            body = ""
+    def ready(body):
         text = collapse_ws(body)
-        if (
+        return (
             "past incidents" in text.lower()
             or ALL_OK_RE.search(text)
             or NO_INCIDENTS_TODAY_RE.search(text)
-        ):
-            return
-        time.sleep(0.5)
+        )
+    wait_for_body_text(driver, ready, timeout=20, poll=0.5)
 
 # ---------- Incidents: ONLY today's block ----------
 
@@ -172,11 +166,7 @@ def collect(driver):
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("cyberark_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-            except Exception:
-                pass
+            save_page_source(html, "cyberark_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
 
@@ -242,12 +232,7 @@ def run():
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("cyberark_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-                logger.debug("💾 HTML guardado en cyberark_page_source.html")
-            except Exception as e:
-                logger.debug("No se pudo guardar HTML: %s", e)
+            save_page_source(html, "cyberark_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
 
@@ -262,8 +247,7 @@ def run():
         msg = format_message(system_status_text, today_inc)
         logger.info("===== CYBERARK =====\n%s\n====================", msg)
 
-        send_telegram(msg)
-        send_teams(msg)
+        notify_all(msg)
 
     except Exception as e:
         logger.exception("ERROR: %s", e)
@@ -13,7 +13,6 @@ con datos correctos y estables.
 import logging
 import os
 import re
-import time
 import json
 from datetime import datetime, timezone
 
@@ -24,9 +23,9 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 # Tu browser/notify originales para run()
-from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc
+from common.browser import make_driver, wait_for_body_text
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -48,20 +47,15 @@ NO_INCIDENTS_TODAY_RE = re.compile(r"No incidents reported today", re.I)
 
 def wait_for_page(driver):
     WebDriverWait(driver, 25).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-    for _ in range(60):
-        try:
-            body = driver.find_element(By.TAG_NAME, "body").text
-        except Exception:
-            body = ""
+    def ready(body):
         text = collapse_ws(body)
-        if ("past incidents" in text.lower()
+        return ("past incidents" in text.lower()
             or "components" in text.lower()
             or "services" in text.lower()
             or NO_INCIDENTS_TODAY_RE.search(text)
             or OPERATIONAL_RE.search(text)
-            or DEGRADED_RE.search(text)):
-            return
-        time.sleep(0.3)
+            or DEGRADED_RE.search(text))
+    wait_for_body_text(driver, ready, timeout=18, poll=0.3)
 
 # -------- Parseo de grupos/children en el mismo orden visual --------
 
@@ -316,12 +310,7 @@ def run():
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("akamai_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-                logger.debug("💾 HTML guardado en akamai_page_source.html")
-            except Exception as e:
-                logger.debug("No se pudo guardar HTML: %s", e)
+            save_page_source(html, "akamai_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
         groups = parse_component_groups(soup)
@@ -331,8 +320,7 @@ def run():
         logger.info("===== AKAMAI (GUARDICORE) =====\n%s\n================================", msg)
 
         # Notificaciones legacy (tu camino anterior)
-        send_telegram(msg)
-        send_teams(msg)
+        notify_all(msg)
 
     except Exception as e:
         short = f"{type(e).__name__}: {str(e)}"
@@ -17,7 +17,6 @@ Salida normalizada para el digest:
 import logging
 import os
 import re
-import time
 from datetime import datetime, timezone
 
 from bs4 import BeautifulSoup
@@ -25,9 +24,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc
+from common.browser import make_driver, wait_for_body_text
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -58,25 +57,24 @@ ACTIVE_STATUS_PATTERN = re.compile(
     r"\b(" + "|".join(re.escape(k) for k in ACTIVE_STATUS_KEYWORDS) + r")\b",
     re.I
 )
+# Incidentes ya cerrados (se descartan en find_active_incidents)
+RESOLVED_BANNER_RE = re.compile(r"\b(Resolved|Completed|Closed)\s*[-—]\s*This incident has been resolved", re.I)
+RESOLVED_PREFIX_RE = re.compile(r"^\s*(Resolved|Completed)\s*[-—]", re.I)
+RESOLVED_STATUS_RE = re.compile(r"^(Resolved|Completed)", re.I)
 
 
 
 def wait_for_page(driver):
     WebDriverWait(driver, 25).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
     # Espera a que cargue texto relevante de componentes o incidents
-    for _ in range(40):
-        try:
-            body = driver.find_element(By.TAG_NAME, "body").text
-        except Exception:
-            body = ""
+    def ready(body):
         text = collapse_ws(body)
-        if ("components" in text.lower()
+        return ("components" in text.lower()
             or "incidents" in text.lower()
             or NO_INCIDENTS_TODAY_RE.search(text)
             or OPERATIONAL_RE.search(text)
-            or ISSUE_STATUS_RE.search(text)):
-            return
-        time.sleep(0.5)
+            or ISSUE_STATUS_RE.search(text))
+    wait_for_body_text(driver, ready, timeout=20, poll=0.5)
 
 # ---------- POPs (heurística) ----------
 
@@ -85,6 +83,9 @@ POP_HINTS = re.compile(
     re.I,
 )
 POP_CODE = re.compile(r"\b[A-Z0-9]{3,5}\b")
+POP_LABEL_RE = re.compile(r"(?:POP[s]?:?|Location[s]?:?|Region[s]?:?)\s*([A-Z0-9,\s/;:-]+)", re.I)
+POP_SPLIT_RE = re.compile(r"[,\s/;:-]+")
+POP_GROUP_NAME_RE = re.compile(r"\b(POPs?|EMEA|AMER|APAC|EU|EUROPE|ASIA|AMERICA)\b", re.I)
 BLACKLIST = {"HTTP", "HTTPS", "CDN", "DNS", "WAF", "API", "EDGE", "CACHE", "SITE", "DATA", "CENTER", "INC"}
 
 def extract_pops_from_text(text: str):
@@ -94,10 +95,10 @@ def extract_pops_from_text(text: str):
     pops = set()
     for ln in lines:
         if POP_HINTS.search(ln) or "pop" in ln.lower():
-            m = re.search(r"(?:POP[s]?:?|Location[s]?:?|Region[s]?:?)\s*([A-Z0-9,\s/;:-]+)", ln, flags=re.I)
+            m = POP_LABEL_RE.search(ln)
             if m:
                 chunk = collapse_ws(m.group(1))
-                for token in re.split(r"[,\s/;:-]+", chunk):
+                for token in POP_SPLIT_RE.split(chunk):
                     tok = token.strip().upper()
                     if POP_CODE.fullmatch(tok) and tok not in BLACKLIST:
                         pops.add(tok)
@@ -166,7 +167,7 @@ def parse_components(soup: BeautifulSoup):
             continue
 
         pops = []
-        if re.search(r"\b(POPs?|EMEA|AMER|APAC|EU|EUROPE|ASIA|AMERICA)\b", name, re.I):
+        if POP_GROUP_NAME_RE.search(name):
             pops = extract_pops_from_component(comp)
             if not pops:
                 pops = extract_pops_from_text(collapse_ws(comp.get_text(" ", strip=True)))
@@ -274,10 +275,10 @@ def find_active_incidents(soup: BeautifulSoup):
         
         # Filtrar incidentes completamente resueltos - pero ser más cuidadoso
         # Solo filtrar si tiene "Resolved" o "Completed" como estado final
-        if re.search(r"\b(Resolved|Completed|Closed)\s*[-—]\s*This incident has been resolved", inc_text, re.I):
+        if RESOLVED_BANNER_RE.search(inc_text):
             continue
         # También filtrar si todo el texto indica resolución
-        if re.search(r"^\s*(Resolved|Completed)\s*[-—]", inc_text, re.I):
+        if RESOLVED_PREFIX_RE.search(inc_text):
             continue
             
         title_el = inc.select_one(".incident-title a, .incident-title, [class*='title']")
@@ -320,7 +321,7 @@ def find_active_incidents(soup: BeautifulSoup):
                 status_word = status_match.group(1)
         
         # Si encontramos un status word pero es "Resolved" al inicio, saltar este incidente
-        if status_word and re.search(r"^(Resolved|Completed)", status_word, re.I):
+        if status_word and RESOLVED_STATUS_RE.search(status_word):
             continue
         
         pops = extract_pops_from_text(inc_text)
@@ -450,11 +451,7 @@ def collect(driver):
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("imperva_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-            except Exception:
-                pass
+            save_page_source(html, "imperva_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
         comps = parse_components(soup)
@@ -525,12 +522,7 @@ def run():
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("imperva_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-                logger.debug("💾 HTML guardado en imperva_page_source.html")
-            except Exception as e:
-                logger.debug("No se pudo guardar HTML: %s", e)
+            save_page_source(html, "imperva_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
         comps = parse_components(soup)
@@ -539,8 +531,7 @@ def run():
         msg = format_message(comps, today_inc)
         logger.info("===== IMPERVA =====\n%s\n===================", msg)
 
-        send_telegram(msg)
-        send_teams(msg)
+        notify_all(msg)
 
     except Exception as e:
         logger.exception("ERROR: %s", e)
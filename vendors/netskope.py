@@ -13,22 +13,26 @@ Reglas aplicadas:
 - Fechas normalizadas a UTC.
 """
 
+import json
 import logging
 import os
 import re
+import tempfile
 import time
+from bisect import bisect_left
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial
 from typing import List, Tuple, Optional
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, SoupStrainer, Tag
 from dateutil import parser as dateparser
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
-from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc
+# Selenium se importa solo en las funciones que usan el navegador: el camino
+# caché / GET directo no paga su árbol de imports.
+from common.browser import make_driver, captured_json_responses
+from common.http import get_session
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -38,17 +42,81 @@ logger = logging.getLogger(__name__)
 NETSKOPE_URL = "https://trustportal.netskope.com/incidents"
 LOOKBACK_DAYS = 15
 SAVE_HTML = os.getenv("SAVE_HTML", "0") == "1"
+# Caché en disco del HTML del portal: evita relanzar Chrome en ejecuciones
+# seguidas. Opt-in (segundos de vida; 0 = desactivada). Por defecto en el
+# directorio temporal, fuera del árbol de trabajo.
+CACHE_TTL = int(os.getenv("NETSKOPE_CACHE_TTL", "0"))
+CACHE_PATH = os.getenv("NETSKOPE_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "netskope_cache.html")
+CACHE_META_PATH = CACHE_PATH + ".meta.json"
+# Si el portal sirve los incidentes ya renderizados, basta un GET (sin Chrome).
+# Es solo un sondeo: sin reintentos y con timeout corto, para que un portal
+# lento no retrase el camino con Selenium.
+HTTP_FIRST = os.getenv("NETSKOPE_HTTP_FIRST", "1") == "1"
+HTTP_TIMEOUT = int(os.getenv("NETSKOPE_HTTP_TIMEOUT", "5"))
 
 # =========================
 # Helpers de fechas/parseo
 # =========================
 MONTHS = "Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec|Ene|Feb|Mar|Abr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic"
 DATE_REGEX_LOOSE = rf"({MONTHS})\s+\d{{1,2}}(?:,\s*\d{{4}})?(?:\s*,?\s*\d{{1,2}}:\d{{2}}\s*(?:AM|PM)?(?:\s*(?:UTC|GMT|[A-Z]{{2,4}}))?)?"
+DATE_LOOSE_RE = re.compile(DATE_REGEX_LOOSE, re.I)
+INCIDENT_NUM_RE = re.compile(r"\bIncident\s+\d+", re.I)
+# Conjuntos constantes para las comprobaciones de tipo de nodo
+HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "div", "summary"))
+SECTION_STOP_TAGS = frozenset(("h1", "h2", "h3", "h4", "summary"))
 STATUS_TOKENS = ["Resolved", "Mitigated", "Monitoring", "Identified", "Investigating", "Degraded", "Update"]
-
-
-
+# Prioridad por token en minúsculas (índice más bajo = gana)
+_STATUS_PRIORITY = {tok.lower(): i for i, tok in enumerate(STATUS_TOKENS)}
+
+# Búsqueda de todos los tokens de estado en una sola pasada (alternancia compilada)
+_STATUS_TOKENS_RE = re.compile("|".join(_STATUS_PRIORITY))
+# Mismos tipos de cadena que get_text() por defecto (excluye comentarios, <script>, etc.)
+_TEXT_TYPES = (NavigableString, CData)
+
+
+
+# Formatos que emite el portal; strptime es mucho más barato que dateutil fuzzy.
+# Sin "%b %d" a secas: dateutil completa el año actual y strptime pondría 1900.
+_FAST_DATE_FORMATS = (
+    "%b %d, %Y",
+    "%b %d, %Y %I:%M %p",
+    "%b %d, %Y %H:%M",
+    "%b %d, %Y %I:%M %p UTC",
+    "%b %d, %Y %H:%M UTC",
+)
+
+def _parse_datetime_fast(text: str) -> Optional[datetime]:
+    """strptime/fromisoformat para los formatos conocidos; None si no encaja."""
+    s = text.strip()
+    dt = None
+    for fmt in _FAST_DATE_FORMATS:
+        try:
+            dt = datetime.strptime(s, fmt)
+            break
+        except ValueError:
+            pass
+    # ISO 8601 de <time datetime="...">
+    if dt is None and len(s) >= 10 and s[4:5] == "-" and s[:4].isdigit():
+        try:
+            dt = datetime.fromisoformat(s)
+        except ValueError:
+            return None
+    # Años "0099" y similares: dateutil los interpreta como dos dígitos
+    if dt is None or dt.year < 100:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+# Memoizado: las mismas fechas se parsean varias veces por tarjeta (<time>,
+# regex global, etiquetas) y dateutil fuzzy es caro. datetime es inmutable.
+# dateutil completa lo que falta ("Jan 5", "10:00 AM") con la fecha de hoy,
+# así que la caché se vacía en cada análisis (incidents_from_sections): un
+# proceso largo (run_vendor --daemon) no arrastra respuestas de otro día.
+@lru_cache(maxsize=1024)
 def parse_datetime_any(text: str) -> Optional[datetime]:
+    if text:
+        dt = _parse_datetime_fast(text)
+        if dt:
+            return dt
     try:
         dt = dateparser.parse(text, fuzzy=True)
         if dt:
@@ -57,7 +125,7 @@ def parse_datetime_any(text: str) -> Optional[datetime]:
             return dt.astimezone(timezone.utc)
     except Exception:
         pass
-    m = re.search(DATE_REGEX_LOOSE, text or "", flags=re.I)
+    m = DATE_LOOSE_RE.search(text or "")
     if m:
         try:
             dt = dateparser.parse(m.group(0), fuzzy=True)
@@ -72,13 +140,21 @@ def parse_datetime_any(text: str) -> Optional[datetime]:
 def dt_fmt(dt: Optional[datetime]) -> str:
     return dt.strftime("%Y-%m-%d %H:%M UTC") if dt else "-"
 
+@lru_cache(maxsize=32)
+def _label_re(label_text: str):
+    return re.compile(re.escape(label_text), re.I)
+
 def nearest_date_after(label_text: str, full_text: str) -> Optional[datetime]:
+    # Búsqueda sin copiar el texto: ni .lower() del bloque entero ni slice de
+    # la ventana (search acepta pos/endpos).
+    if not full_text:
+        return None
     try:
-        pos = (full_text or "").lower().find(label_text.lower())
-        if pos == -1:
+        lab = _label_re(label_text).search(full_text)
+        if not lab:
             return None
-        window = full_text[pos: pos + 500]
-        m = re.search(DATE_REGEX_LOOSE, window, flags=re.I)
+        pos = lab.start()
+        m = DATE_LOOSE_RE.search(full_text, pos, pos + 500)
         if m:
             return parse_datetime_any(m.group(0))
     except Exception:
@@ -92,84 +168,213 @@ def nearest_date_after_any(labels: List[str], text: str) -> Optional[datetime]:
             return dt
     return None
 
+def status_tokens_in(low: str) -> set:
+    """Tokens de estado (en minúsculas) presentes en un texto ya en minúsculas."""
+    if not low:
+        return set()
+    return set(_STATUS_TOKENS_RE.findall(low))
+
 def latest_status_from_text(text: str) -> Optional[str]:
-    low = (text or "").lower()
-    # El "último" evento en el portal suele estar al principio del bloque
-    candidates = ["resolved", "mitigated", "monitoring", "identified", "investigating", "degraded", "update"]
-    for tok in candidates:
-        if tok in low:
-            return tok.title()
-    return None
+    # El "último" evento en el portal suele estar al principio del bloque;
+    # ante varios tokens gana el de mayor prioridad según STATUS_TOKENS.
+    found = status_tokens_in((text or "").lower())
+    if not found:
+        return None
+    return min(found, key=_STATUS_PRIORITY.__getitem__).title()
 
-def find_nearest_header_date(node) -> Optional[datetime]:
+def _previous_sibling_date(node, cache: Optional[dict]) -> Optional[datetime]:
+    """
+    Primera fecha entre los hermanos anteriores de 'node' (del más cercano hacia
+    atrás). 'cache' (id(nodo) -> resultado) la comparten todas las tarjetas de un
+    mismo árbol: tarjetas hermanas no vuelven a recorrer la misma cadena.
+    """
+    walked = []
+    dt = None
+    cur = node
+    while True:
+        if cache is not None and id(cur) in cache:
+            dt = cache[id(cur)]
+            break
+        walked.append(id(cur))
+        sib = getattr(cur, "previous_sibling", None)
+        if not sib:
+            break
+        if getattr(sib, "get_text", None):
+            dt = parse_datetime_any(sib.get_text(strip=True))
+            if dt:
+                break
+        cur = sib
+    if cache is not None:
+        for key in walked:
+            cache[key] = dt
+    return dt
+
+def find_nearest_header_date(node, cache: Optional[dict] = None) -> Optional[datetime]:
     cur = node; steps = 0
     while cur and steps < 15:
-        sib = getattr(cur, "previous_sibling", None)
-        while sib:
-            if getattr(sib, "get_text", None):
-                txt = sib.get_text(strip=True)
-                dt = parse_datetime_any(txt)
-                if dt:
-                    return dt
-            sib = getattr(sib, "previous_sibling", None)
+        dt = _previous_sibling_date(cur, cache)
+        if dt:
+            return dt
         cur = getattr(cur, "parent", None); steps += 1
     return None
 
+def _has_status_text(node, skip=None) -> bool:
+    """¿Algún string del subárbol de 'node' (fuera del hijo 'skip') tiene un token de estado?"""
+    for child in node.children:
+        if child is skip:
+            continue
+        if isinstance(child, Tag):
+            strings = (d for d in child.descendants if type(d) in _TEXT_TYPES)
+        elif type(child) in _TEXT_TYPES:
+            strings = (child,)
+        else:
+            continue
+        for piece in strings:
+            if _STATUS_TOKENS_RE.search(piece.lower()):
+                return True
+    return False
+
 def incident_container_for(node):
+    # Los tokens de estado no contienen espacios, así que nunca cruzan dos
+    # strings: en cada ancestro basta mirar lo que queda fuera del hijo ya
+    # examinado, en vez de repetir get_text() del subárbol completo 8 veces.
     cur = node
+    prev = None
     for _ in range(8):
-        if not hasattr(cur, "get_text"):
+        if not isinstance(cur, Tag):
             break
-        classes = cur.get("class") if hasattr(cur, "get") else None
+        classes = cur.get("class")
         class_str = " ".join(classes).lower() if isinstance(classes, list) else (classes or "")
-        txt = cur.get_text(" ", strip=True).lower()
-        if ("incident" in class_str) or any(s in txt for s in [
-            "resolved", "mitigated", "investigating", "identified", "update", "monitoring", "degraded"
-        ]):
+        if "incident" in class_str:
             return cur
-        cur = getattr(cur, "parent", None)
+        if prev is None:
+            # Nodo de partida: texto propio completo (p. ej. el <a> de la tarjeta)
+            if status_tokens_in(cur.get_text(" ", strip=True).lower()):
+                return cur
+        elif _has_status_text(cur, skip=prev):
+            return cur
+        prev = cur
+        cur = cur.parent
         if cur is None:
             break
     return node
 
 def wait_for_page(driver):
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    # Equivale al antiguo XPath //*[contains(., 'Incidents') ...] (los otros dos
+    # literales ya contienen 'Incidents'), pero sin evaluar el string-value de
+    # cada elemento del documento en cada sondeo.
     WebDriverWait(driver, 30).until(
-        EC.presence_of_element_located(
-            (By.XPATH, "//*[contains(., 'Incidents') or contains(., 'Open Incidents') or contains(., 'Past Incidents')]")
+        lambda d: d.execute_script(
+            "return !!document.body && document.body.textContent.includes('Incidents');"
         )
     )
 
 # =========================
 # Localización de secciones y tarjetas
 # =========================
-def extract_sections_strict(soup: BeautifulSoup) -> Tuple[List, List]:
-    def find_heading(keywords: List[str]):
-        for kw in keywords:
-            h = soup.find(
-                lambda tag: tag.name in ["h1","h2","h3","h4","div","summary"]
-                and tag.get_text(strip=True)
-                and kw.lower() in tag.get_text(strip=True).lower()
-            )
-            if h: return h
-        return None
+def is_card_node(node) -> bool:
+    """Equivalente a ".incident, [class*='incident'], a[href*='/incidents/']"."""
+    classes = node.get("class")
+    if classes and "incident" in " ".join(classes):
+        return True
+    return node.name == "a" and "/incidents/" in (node.get("href") or "")
+
+def _heading_text_index(soup: BeautifulSoup):
+    """
+    Texto de todo el documento (como get_text(strip=True), en minúsculas) y,
+    en orden de documento, (tag, inicio, fin) de cada HEADING_TAGS: el texto
+    de un tag es texto[inicio:fin]. Se calcula en un único recorrido.
+    """
+    pieces: List[str] = []
+    offset = 0
+    spans = []
+    stack = []  # [tag, inicio, índice en spans o None]
+    for node in soup.descendants:
+        parent = node.parent
+        while stack and stack[-1][0] is not parent:
+            _, start, idx = stack.pop()
+            if idx is not None:
+                spans[idx] = (spans[idx][0], start, offset)
+        if isinstance(node, Tag):
+            idx = None
+            if node.name in HEADING_TAGS:
+                idx = len(spans)
+                spans.append((node, offset, offset))
+            stack.append([node, offset, idx])
+        elif type(node) in _TEXT_TYPES:
+            piece = node.strip().lower()
+            if piece:
+                pieces.append(piece)
+                offset += len(piece)
+    while stack:
+        _, start, idx = stack.pop()
+        if idx is not None:
+            spans[idx] = (spans[idx][0], start, offset)
+    return "".join(pieces), spans
+
+OPEN_HEADING_KEYWORDS = ["Open Incidents", "Active Incidents", "Active", "Current incidents"]
+PAST_HEADING_KEYWORDS = ["Past Incidents (Previous 15 days)", "Past Incidents", "Previous 15 days"]
+
+def _find_heading(full_low: str, heading_spans, keywords: List[str]):
+    """
+    Equivale a soup.find(tag de HEADING_TAGS cuyo get_text(strip=True) contenga
+    kw), pero sin recalcular el texto de cada <div> para cada palabra clave.
+    """
+    for kw in keywords:
+        kw_low = kw.lower()
+        hits = []
+        pos = full_low.find(kw_low)
+        while pos != -1:
+            hits.append(pos)
+            pos = full_low.find(kw_low, pos + 1)
+        if not hits:
+            continue
+        for tag, start, end in heading_spans:
+            i = bisect_left(hits, start)
+            if i < len(hits) and hits[i] + len(kw_low) <= end:
+                return tag
+    return None
+
+OPEN_STOP_KEYWORDS = ["past incidents", "previous 15 days", "maintenance", "status", "home"]
+PAST_STOP_KEYWORDS = ["open incidents", "maintenance", "status", "home"]
 
-    def collect_after(heading, stop_keywords: List[str]):
-        cards = []
-        if not heading:
-            return cards
-        for node in heading.find_all_next(True):
-            if node.name in ["h1","h2","h3","h4","summary"]:
-                txt = node.get_text(strip=True).lower()
-                if any(sk in txt for sk in stop_keywords):
-                    break
-            cards.extend(node.select(".incident, [class*='incident'], a[href*='/incidents/']"))
+def _collect_after(heading, stop_keywords: List[str]) -> List:
+    """
+    Tarjetas de la sección que abre 'heading': las mismas, en el mismo orden,
+    que node.select(selector de tarjeta) sobre cada nodo visitado hasta el
+    encabezado de parada, pero sin repetir tarjetas ni subárboles. Una tarjeta
+    cuenta si su padre es un nodo visitado o está dentro de uno; por eso, tras
+    la parada, se sigue hasta cerrar los subárboles ya abiertos (p. ej.
+    <section><h2>Past…</h2>tarjetas</section> entra entero, como antes).
+    """
+    cards = []
+    if not heading:
         return cards
+    inside = set()
+    stopped = False
+    for node in heading.find_all_next(True):
+        if not stopped and node.name in SECTION_STOP_TAGS:
+            txt = node.get_text(strip=True).lower()
+            stopped = any(sk in txt for sk in stop_keywords)
+        parent_inside = id(node.parent) in inside
+        if stopped and not parent_inside:
+            break
+        if parent_inside and is_card_node(node):
+            cards.append(node)
+        inside.add(id(node))
+    return cards
+
+def extract_sections_strict(soup: BeautifulSoup, index=None) -> Tuple[List, List]:
+    # 'index': _heading_text_index(soup) ya calculado (rendered_sections lo reutiliza)
+    full_low, heading_spans = index or _heading_text_index(soup)
 
-    open_heading = find_heading(["Open Incidents", "Active Incidents", "Active", "Current incidents"])
-    past_heading = find_heading(["Past Incidents (Previous 15 days)", "Past Incidents", "Previous 15 days"])
+    open_heading = _find_heading(full_low, heading_spans, OPEN_HEADING_KEYWORDS)
+    past_heading = _find_heading(full_low, heading_spans, PAST_HEADING_KEYWORDS)
 
-    open_cards = collect_after(open_heading, ["past incidents", "previous 15 days", "maintenance", "status", "home"])
-    past_cards = collect_after(past_heading, ["open incidents", "maintenance", "status", "home"])
+    open_cards = _collect_after(open_heading, OPEN_STOP_KEYWORDS)
+    past_cards = _collect_after(past_heading, PAST_STOP_KEYWORDS)
 
     if not past_cards:
         all_anchors = soup.select("a[href*='/incidents/']")
@@ -182,21 +387,47 @@ def extract_sections_strict(soup: BeautifulSoup) -> Tuple[List, List]:
 
     return open_cards, past_cards
 
-def normalize_card(card) -> dict:
+_TITLE_CLASS_RE = re.compile(r"incident-title|card-title", re.I)
+
+def normalize_card(card, header_cache: Optional[dict] = None) -> dict:
     container = card
     if getattr(card, "name", None) == "a":
         container = incident_container_for(card)
 
+    # Un solo recorrido del subárbol: texto, enlaces de incidente, <time> y título
+    text_parts: List[str] = []
+    links: List = []
+    times: List = []
+    title_el = None
+    heading_el = None
+    if hasattr(container, "descendants"):
+        for node in container.descendants:
+            if isinstance(node, Tag):
+                name = node.name
+                if name == "a":
+                    if "/incidents" in (node.get("href") or ""):
+                        links.append(node)
+                elif name == "time":
+                    times.append(node)
+                elif heading_el is None and name in ("h1", "h2", "h3", "h4"):
+                    heading_el = node
+                if title_el is None:
+                    classes = node.get("class") or []
+                    if any(_TITLE_CLASS_RE.search(c) for c in classes):
+                        title_el = node
+            elif type(node) in _TEXT_TYPES:
+                piece = node.strip()
+                if piece:
+                    text_parts.append(piece)
+
     # URL + título
     incident_link = None
-    for a in container.find_all("a", href=True):
-        href = a.get("href", "")
-        if "/incidents" in href:
-            txt = a.get_text(" ", strip=True)
-            if re.search(r"\bIncident\s+\d+", txt, flags=re.I):
-                incident_link = a; break
-            if not incident_link:
-                incident_link = a
+    for a in links:
+        txt = a.get_text(" ", strip=True)
+        if INCIDENT_NUM_RE.search(txt):
+            incident_link = a; break
+        if not incident_link:
+            incident_link = a
     if incident_link:
         href = incident_link["href"]
         url = "https://trustportal.netskope.com" + href if href.startswith("/") else href
@@ -204,21 +435,18 @@ def normalize_card(card) -> dict:
     else:
         url = None
         title = None
-        el = container.find(class_=re.compile(r"incident-title|card-title", re.I))
-        if el: title = el.get_text(strip=True)
-        if not title:
-            h = container.find(["h1","h2","h3","h4"])
-            if h: title = h.get_text(strip=True)
+        if title_el: title = title_el.get_text(strip=True)
+        if not title and heading_el:
+            title = heading_el.get_text(strip=True)
         if not title:
             title = "Netskope Incident"
 
-    text = container.get_text(" ", strip=True) if hasattr(container, "get_text") else ""
+    text = " ".join(text_parts)
 
     # Fechas
     started_at = None
     ended_at = None
 
-    times = container.find_all("time") if hasattr(container, "find_all") else []
     parsed_times = []
     for t in times:
         dt = parse_datetime_any(t.get("datetime") or t.get_text(strip=True))
@@ -229,7 +457,7 @@ def normalize_card(card) -> dict:
         ended_at = parsed_times[-1]
 
     # Regex global (por si no hay <time>)
-    all_dates = [parse_datetime_any(m.group(0)) for m in re.finditer(DATE_REGEX_LOOSE, text or "", flags=re.I)]
+    all_dates = [parse_datetime_any(m.group(0)) for m in DATE_LOOSE_RE.finditer(text or "")]
     all_dates = [d for d in all_dates if d]
 
     # Inicio
@@ -247,7 +475,7 @@ def normalize_card(card) -> dict:
         ended_at = max(all_dates)
 
     if not started_at:
-        started_at = find_nearest_header_date(container)
+        started_at = find_nearest_header_date(container, header_cache)
 
     status = latest_status_from_text(text) or "Update"
 
@@ -260,73 +488,266 @@ def normalize_card(card) -> dict:
         "raw_text": text,
     }
 
+def normalize_cards(open_cards: List, past_cards: List) -> Tuple[List[dict], List[dict]]:
+    """
+    Normaliza ambas secciones. La caché de fechas de encabezado se comparte
+    entre todas las tarjetas del mismo árbol.
+    """
+    normalize = partial(normalize_card, header_cache={})
+    return [normalize(c) for c in open_cards], [normalize(c) for c in past_cards]
+
+def unique_containers(cards: List) -> List:
+    """
+    Sustituye cada tarjeta por el contenedor que normalize_card usaría (los <a>
+    suben con incident_container_for) y quita repetidos por nodo, conservando
+    el primero. El resultado de normalize_card solo depende del contenedor,
+    así que un ancla y su tarjeta .incident se normalizan una sola vez.
+    """
+    seen = set()
+    out = []
+    for card in cards:
+        container = incident_container_for(card) if getattr(card, "name", None) == "a" else card
+        if id(container) not in seen:
+            seen.add(id(container))
+            out.append(container)
+    return out
+
 def dedup_incidents(items: List[dict]) -> List[dict]:
-    seen = set(); out = []
+    # setdefault conserva la primera aparición y el orden de inserción
+    out = {}
     for it in items:
-        key = ((it.get("title") or "").strip(), (it.get("url") or "").strip())
-        if key in seen: continue
-        seen.add(key); out.append(it)
-    return out
+        out.setdefault(((it.get("title") or "").strip(), (it.get("url") or "").strip()), it)
+    return list(out.values())
 
 # =========================
 # Scrape + clasificación
 # =========================
-def analizar_netskope(driver) -> Tuple[List[dict], List[dict]]:
+# Búsqueda + click dentro del navegador: un único round trip de WebDriver.
+# Antes del click se anota cuántos enlaces de incidente hay (y el <details>
+# del <summary>, si lo es) para poder esperar a que el historial se expanda.
+_EXPAND_PAST_JS = """
+const labels = arguments[0];
+for (const el of document.querySelectorAll('summary, button')) {
+  const txt = (el.textContent || '').replace(/\\s+/g, ' ').trim();
+  if (!txt || !labels.some(l => txt.includes(l))) continue;
+  const details = el.tagName === 'SUMMARY' ? el.closest('details') : null;
+  if (details && details.open) return false;
+  try {
+    window.__nsPastBefore = document.querySelectorAll("a[href*='/incidents/']").length;
+    window.__nsPastDetails = details;
+    el.scrollIntoView({block: 'center'});
+    el.click();
+    return true;
+  } catch (e) {}
+}
+return false;
+"""
+
+# Condición posterior al click: <details> abierto o más enlaces de incidente
+# que antes (el selector de "DOM listo" ya se cumplía antes del click).
+_PAST_EXPANDED_JS = """
+const details = window.__nsPastDetails;
+if (details) return details.open;
+return document.querySelectorAll("a[href*='/incidents/']").length > (window.__nsPastBefore || 0);
+"""
+PAST_EXPAND_TIMEOUT = 5
+
+def expand_past_incidents(driver) -> bool:
+    """Expande 'Past Incidents' si es colapsable. True si se hizo click."""
+    labels = [
+        "Past Incidents (Previous 15 days)",
+        "Past Incidents",
+        "Previous 15 days",
+    ]
+    try:
+        return bool(driver.execute_script(_EXPAND_PAST_JS, labels))
+    except Exception:
+        return False
+
+INCIDENTS_READY_CSS = "[class*='incident'], a[href*='/incidents/']"
+
+def fetch_page_source(driver) -> str:
+    """Carga el portal con Selenium, expande 'Past Incidents' y devuelve el HTML."""
     logger.info("🔍 Cargando Netskope…")
     driver.get(NETSKOPE_URL)
     wait_for_page(driver)
 
-    # Intentar expandir "Past Incidents" si es colapsable
-    try:
-        candidatos = [
-            "Past Incidents (Previous 15 days)",
-            "Past Incidents",
-            "Previous 15 days",
-        ]
-        for label in candidatos:
-            elems = driver.find_elements(By.XPATH, f"//*[contains(normalize-space(.), '{label}')]")
-            for el in elems:
-                tag = (el.tag_name or "").lower()
-                txt = (el.text or "").strip()
-                if not txt:
-                    continue
-                if tag in ("summary", "button"):
-                    try:
-                        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                        el.click()
-                        time.sleep(1)
-                        raise StopIteration
-                    except Exception:
-                        pass
-    except StopIteration:
-        pass
-    except Exception:
-        pass
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
 
-    # Espera a que aparezca al menos un enlace de incidente
+    # Sin sleeps fijos: seguimos en cuanto el DOM de incidentes está poblado
     try:
         WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/incidents/']"))
+            lambda d: len(d.find_elements(By.CSS_SELECTOR, INCIDENTS_READY_CSS)) > 0
         )
     except Exception:
         pass
 
-    time.sleep(1.5)
+    # Intentar expandir "Past Incidents" si es colapsable y esperar a que el
+    # historial aparezca de verdad (si no cambia nada, expira y seguimos)
+    if expand_past_incidents(driver):
+        try:
+            WebDriverWait(driver, PAST_EXPAND_TIMEOUT, poll_frequency=0.25).until(
+                lambda d: d.execute_script(_PAST_EXPANDED_JS)
+            )
+        except Exception:
+            pass
 
     html = driver.page_source
     if SAVE_HTML:
-        try:
-            with open("netskope_page_source.html", "w", encoding="utf-8") as f:
-                f.write(html)
-logger.debug("💾 HTML guardado en netskope_page_source.html")
-            except Exception as e:
-                logger.debug("No se pudo guardar HTML: %s", e)
+        save_page_source(html, "netskope_page_source.html")
+    # Descubrimiento (SCRAPER_CAPTURE_XHR=1): APIs JSON de incidentes que usa el
+    # portal; si alguna es pública, se puede leer con un GET y saltarse el DOM.
+    for api_url, _ in captured_json_responses(driver, "incident"):
+        logger.info("🔎 Netskope API JSON detectada: %s", api_url)
+    return html
+
+def read_cached_html() -> Optional[str]:
+    """HTML cacheado si existe y tiene menos de CACHE_TTL segundos; None si no."""
+    if CACHE_TTL <= 0:
+        return None
+    try:
+        age = time.time() - os.path.getmtime(CACHE_PATH)
+        if age >= CACHE_TTL:
+            return None
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            html = f.read()
+    except OSError:
+        return None
+    logger.info("♻️ Usando HTML cacheado de Netskope (%.0fs)", age)
+    return html
 
-    soup = BeautifulSoup(html, "lxml")
-    open_cards, past_cards = extract_sections_strict(soup)
+def _write_atomic(path: str, text: str) -> None:
+    """tmp + os.replace: otro proceso nunca lee un fichero a medio escribir."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
 
-    activos = [normalize_card(c) for c in open_cards]
-    pasados = [normalize_card(c) for c in past_cards]
+def write_cached_html(html: str, validators: Optional[dict] = None) -> None:
+    """
+    Guarda el HTML y, si vino de un GET directo, su ETag/Last-Modified al lado
+    (CACHE_META_PATH) para la siguiente petición condicional. HTML de Selenium
+    no tiene validadores: se borra cualquier sidecar previo.
+    """
+    if CACHE_TTL <= 0:
+        return
+    try:
+        _write_atomic(CACHE_PATH, html)
+        if validators:
+            _write_atomic(CACHE_META_PATH, json.dumps(validators))
+        elif os.path.exists(CACHE_META_PATH):
+            os.remove(CACHE_META_PATH)
+    except OSError as e:
+        logger.debug("No se pudo escribir la caché HTML: %s", e)
+
+def _conditional_headers() -> dict:
+    """If-None-Match / If-Modified-Since del último GET directo (si hay caché)."""
+    if CACHE_TTL <= 0 or not os.path.exists(CACHE_PATH):
+        return {}
+    try:
+        with open(CACHE_META_PATH, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+def _revalidated_cache() -> Optional[str]:
+    """Tras un 304: HTML cacheado (sin mirar TTL) y se renueva su mtime."""
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            html = f.read()
+        os.utime(CACHE_PATH)
+    except OSError:
+        return None
+    logger.info("♻️ Netskope sin cambios (HTTP 304); usando HTML cacheado")
+    return html
+
+def rendered_sections(soup: BeautifulSoup) -> Optional[Tuple[List, List]]:
+    """
+    Secciones (abiertos, pasados) solo si el HTML trae el portal ya renderizado:
+    un encabezado real (h1–h4/summary, no un <div> de navegación, <noscript> o
+    pie) de incidentes abiertos o pasados con al menos una tarjeta debajo. Un
+    shell sin renderizar daría un informe "sin incidentes" falso, así que
+    devuelve None y se usa Selenium (también si el portal no tiene incidentes).
+    """
+    index = _heading_text_index(soup)
+    full_low, heading_spans = index
+    real_spans = [span for span in heading_spans if span[0].name in SECTION_STOP_TAGS]
+    for keywords, stops in ((OPEN_HEADING_KEYWORDS, OPEN_STOP_KEYWORDS),
+                            (PAST_HEADING_KEYWORDS, PAST_STOP_KEYWORDS)):
+        if _collect_after(_find_heading(full_low, real_spans, keywords), stops):
+            return extract_sections_strict(soup, index)
+    return None
+
+def fetch_incidents_http() -> Optional[Tuple[List[dict], List[dict]]]:
+    """
+    GET directo del portal. Si el DOM servido ya trae las secciones de
+    incidentes (rendered_sections), devuelve (activos, pasados_15) a partir de
+    ese mismo árbol; None si hay que renderizar con Selenium.
+    """
+    if not HTTP_FIRST:
+        return None
+    ua = os.getenv("SCRAPER_UA") or (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+    )
+    headers = {"User-Agent": ua, **_conditional_headers()}
+    try:
+        r = get_session(retries=False).get(NETSKOPE_URL, headers=headers, timeout=HTTP_TIMEOUT)
+    except Exception as e:
+        logger.debug("GET directo de Netskope falló: %s", e)
+        return None
+    if r.status_code == 304:
+        html = _revalidated_cache()
+        return parse_incidents_html(html) if html is not None else None
+    if r.status_code != 200:
+        logger.debug("GET directo de Netskope devolvió HTTP %s; se usará Selenium", r.status_code)
+        return None
+    soup = BeautifulSoup(r.text, "lxml", parse_only=_BODY_ONLY)
+    sections = rendered_sections(soup)
+    if sections is None:
+        soup.decompose()
+        logger.debug("Netskope sin incidentes renderizados en el HTML servido; se usará Selenium")
+        return None
+    logger.info("🔍 Netskope servido sin navegador (HTTP)")
+    write_cached_html(r.text, {
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    })
+    return incidents_from_sections(soup, *sections)
+
+def incidents_without_browser() -> Optional[Tuple[List[dict], List[dict]]]:
+    """Caché en disco y, si no, GET directo (condicional). None si hace falta Selenium."""
+    html = read_cached_html()
+    if html is not None:
+        return parse_incidents_html(html)
+    return fetch_incidents_http()
+
+# Solo se construye <body>: el <head> (estilos, scripts, meta) nunca se consulta.
+# Un filtro más fino (solo tarjetas/encabezados) rompería la subida a ancestros
+# de incident_container_for / find_nearest_header_date.
+_BODY_ONLY = SoupStrainer("body")
+
+def parse_incidents_html(html: str) -> Tuple[List[dict], List[dict]]:
+    """Parsea el HTML del portal y devuelve (activos, pasados_15)."""
+    soup = BeautifulSoup(html, "lxml", parse_only=_BODY_ONLY)
+    return incidents_from_sections(soup, *extract_sections_strict(soup))
+
+def incidents_from_sections(soup: BeautifulSoup, open_cards: List, past_cards: List) -> Tuple[List[dict], List[dict]]:
+    """Normaliza y clasifica las tarjetas de 'soup'; libera el árbol al terminar."""
+    parse_datetime_any.cache_clear()
+    activos, pasados = normalize_cards(unique_containers(open_cards), unique_containers(past_cards))
+    # Los dicts normalizados solo guardan str/datetime: liberamos ya el árbol
+    # (padre<->hijo son ciclos, el GC lo recogería más tarde) y el pico de
+    # memoria no suma árbol + resultados + formateo.
+    soup.decompose()
+    del open_cards, past_cards
     activos = dedup_incidents(activos)
     pasados = dedup_incidents(pasados)
 
@@ -355,6 +776,20 @@ logger.debug("💾 HTML guardado en netskope_page_source.html")
 
     return activos, pasados_15
 
+def analizar_netskope(driver=None, resultado: Optional[Tuple[List[dict], List[dict]]] = None) -> Tuple[List[dict], List[dict]]:
+    """
+    Scrape + clasificación. Si hay HTML cacheado reciente (NETSKOPE_CACHE_TTL) o el GET
+    directo trae los incidentes, no se toca el navegador; 'driver' puede ser
+    None en ese caso. 'resultado': lo que ya devolvió incidents_without_browser().
+    """
+    if resultado is None:
+        resultado = incidents_without_browser()
+    if resultado is None:
+        html = fetch_page_source(driver)
+        write_cached_html(html)
+        resultado = parse_incidents_html(html)
+    return resultado
+
 # =========================
 # Formato de salida (texto limpio)
 # =========================
@@ -458,22 +893,24 @@ def collect(driver):
 # Entrypoint del vendor (con notificaciones)
 # =========================
 def run():
-    driver = make_driver()
+    # Con caché fresca o HTML servido ya renderizado ni siquiera arrancamos Chrome
+    resultado = incidents_without_browser()
+    driver = make_driver() if resultado is None else None
     try:
-        activos, pasados_15 = analizar_netskope(driver)
+        activos, pasados_15 = analizar_netskope(driver, resultado=resultado)
         resumen = format_message(activos, pasados_15)
 
         logger.info("===== NETSKOPE =====\n%s\n====================", resumen)
 
-        send_telegram(resumen)
-        send_teams(resumen)
+        notify_all(resumen)
     except Exception as e:
         logger.exception("ERROR: %s", e)
         send_telegram(f"Netskope - Monitor\nError:\n{str(e)}")
         send_teams(f"❌ Netskope - Monitor\nError: {str(e)}")
         raise
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
@@ -16,7 +16,6 @@ Reglas aplicadas:
 import logging
 import os
 import re
-import time
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Tuple, Optional
 
@@ -26,8 +25,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -55,12 +54,20 @@ def wait_for_page(driver) -> None:
     for by, sel in preds:
         try:
             WebDriverWait(driver, 20).until(EC.presence_of_element_located((by, sel)))
-            return
+            break
         except Exception as e:
             last_err = e
             continue
-    if last_err:
-        raise last_err
+    else:
+        if last_err:
+            raise last_err
+    # En lugar de un sleep fijo: esperamos a que termine la carga del documento
+    try:
+        WebDriverWait(driver, 5, poll_frequency=0.1).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except Exception:
+        pass
 
 # ---------------- Parseo ---------------- #
 
@@ -189,15 +196,10 @@ def collect(driver) -> Dict[str, Any]:
     """
     driver.get(URL)
     wait_for_page(driver)
-    time.sleep(0.5)
 
     html = driver.page_source
     if SAVE_HTML:
-        try:
-            with open("proofpoint_page_source.html", "w", encoding="utf-8") as f:
-                f.write(html)
-        except Exception:
-            pass
+        save_page_source(html, "proofpoint_page_source.html")
 
     activos, pasados, banner_text = parse_incidents_from_html(html)
 
@@ -233,24 +235,17 @@ def run():
     try:
         driver.get(URL)
         wait_for_page(driver)
-        time.sleep(0.5)
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("proofpoint_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-                logger.debug("💾 HTML guardado en proofpoint_page_source.html")
-            except Exception as e:
-                logger.debug("No se pudo guardar HTML: %s", e)
+            save_page_source(html, "proofpoint_page_source.html")
 
         activos, pasados, banner_text = parse_incidents_from_html(html)
 
         resumen = format_message(activos, banner_text)
         logger.info("===== PROOFPOINT =====\n%s\n======================", resumen)
 
-        send_telegram(resumen)
-        send_teams(resumen)
+        notify_all(resumen)
 
     except Exception as e:
         logger.exception("ERROR: %s", e)
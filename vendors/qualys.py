@@ -14,8 +14,8 @@ Qualys — History:
 import logging
 import os
 import re
-import time
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
 
 from bs4 import BeautifulSoup
@@ -23,9 +23,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc
+from common.browser import make_driver, wait_for_body_text
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +45,14 @@ DATE_RANGE_RE = re.compile(
 # Encabezado de mes: "June 2025"
 MONTH_HEADER_RE = re.compile(rf"\b({MONTHS_FULL})\s+(\d{{4}})\b", re.I)
 
+# Patrones auxiliares (precompilados: se evalúan por tarjeta/línea)
+_COMMA_RE = re.compile(r"\s*,\s*")
+_RANGE_SPLIT_RE = re.compile(r"\s*[-–]\s*")
+_MONTH_DAY_RE = re.compile(rf"({MONTHS_SHORT})\s+\d{{1,2}}", re.I)
+_DT_PART_RE = re.compile(rf"({MONTHS_SHORT})\s+(\d{{1,2}}),\s*(\d{{1,2}}:\d{{2}})", re.I)
+_NAV_LINK_RE = re.compile(r"Subscribe To Updates|Support|Filter Components|Qualys|Login|Log in|Terms|Privacy|Guest", re.I)
+_CLOSING_LINE_RE = re.compile(r"has been resolved|has been mitigated|has been completed", re.I)
+
 # Mapa TZ abreviado → offset en minutos
 TZ_OFFSETS_MIN = {
     "UTC": 0, "GMT": 0,
@@ -64,11 +72,7 @@ _collapse_ws = collapse_ws
 def wait_for_page(driver):
     # Espera a que haya enlaces y que aparezca algún rango horario en el body (render dinámico)
     WebDriverWait(driver, 25).until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[href]")))
-    for _ in range(40):
-        body_text = driver.find_element(By.TAG_NAME, "body").text
-        if DATE_RANGE_RE.search(_collapse_ws(body_text)):
-            return
-        time.sleep(0.4)
+    wait_for_body_text(driver, lambda body: DATE_RANGE_RE.search(_collapse_ws(body)), timeout=16, poll=0.4)
 
 def _norm_node_text(node) -> str:
     try:
@@ -103,6 +107,7 @@ def _find_year_context(node) -> Optional[int]:
         anc = getattr(anc, "parent", None)
     return None
 
+@lru_cache(maxsize=256)
 def _parse_with_tz_abbrev(s_no_tz: str, tzabbr: str) -> Optional[datetime]:
     """Convierte 'Jun 13, 2025 09:18' con tz 'PDT' a UTC usando el mapa."""
     try:
@@ -120,8 +125,8 @@ def _build_dt_strings(part: str, year: int) -> Optional[str]:
     Normaliza 'Jun 13 , 09:18' -> 'Jun 13, 2025 09:18' (sin TZ).
     """
     part = _collapse_ws(part)
-    part = re.sub(r"\s*,\s*", ", ", part)
-    m = re.match(rf"({MONTHS_SHORT})\s+(\d{{1,2}}),\s*(\d{{1,2}}:\d{{2}})", part, flags=re.I)
+    part = _COMMA_RE.sub(", ", part)
+    m = _DT_PART_RE.match(part)
     if not m:
         return None
     mon, day, hm = m.groups()
@@ -138,12 +143,12 @@ def _parse_date_range(date_text: str, context_node):
         return None, None
     tzabbr = m.group(3)
     # Divide por '-' o '–'
-    parts = re.split(r"\s*[-–]\s*", m.group(0))
+    parts = _RANGE_SPLIT_RE.split(m.group(0))
     left = (parts[0] or "").strip().rstrip(",")
     right = (parts[1] or "").strip()
     # Si 'right' no tiene mes/día, hereda del 'left'
-    if not re.search(rf"({MONTHS_SHORT})\s+\d{{1,2}}", right, flags=re.I):
-        md = re.match(rf"({MONTHS_SHORT})\s+\d{{1,2}}", left, flags=re.I)
+    if not _MONTH_DAY_RE.search(right):
+        md = _MONTH_DAY_RE.match(left)
         if md:
             right = f"{md.group(0)}, {right}"
 
@@ -158,9 +163,11 @@ def _is_scheduled(text: str) -> bool:
     t = (text or "").lower()
     return "[scheduled]" in t or "scheduled maintenance" in t
 
+_RESOLVED_WORD_RE = re.compile(r"\bresolved\b")
+
 def _status_from_text(text: str) -> str:
     low = (text or "").lower()
-    if "has been resolved" in low or re.search(r"\bresolved\b", low):
+    if "has been resolved" in low or _RESOLVED_WORD_RE.search(low):
         return "Resolved"
     if "mitigated" in low:
         return "Mitigated"
@@ -171,6 +178,8 @@ def _status_from_text(text: str) -> str:
 # ------------------ Extracción ------------------
 
 def _extract_items(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+    # Caché por ejecución: no se arrastra entre análisis de un proceso largo
+    _parse_with_tz_abbrev.cache_clear()
     items: List[Dict[str, Any]] = []
 
     # 1) Candidatos: <div> cuyo texto NORMALIZADO contenga EXACTAMENTE un rango horario
@@ -209,7 +218,7 @@ def _extract_items(soup: BeautifulSoup) -> List[Dict[str, Any]]:
             t = _collapse_ws(a.get_text(" ", strip=True))
             if not t:
                 continue
-            if re.search(r"Subscribe To Updates|Support|Filter Components|Qualys|Login|Log in|Terms|Privacy|Guest", t, re.I):
+            if _NAV_LINK_RE.search(t):
                 continue
             pos_title = txt.find(t)
             if pos_date != -1 and pos_title != -1 and pos_title < pos_date and len(t) > best_len:
@@ -227,7 +236,7 @@ def _extract_items(soup: BeautifulSoup) -> List[Dict[str, Any]]:
             for ln in raw_lines:
                 if DATE_RANGE_RE.search(_collapse_ws(ln)):
                     break
-                if _is_scheduled(ln) or re.search(r"has been resolved|has been mitigated|has been completed", ln, re.I):
+                if _is_scheduled(ln) or _CLOSING_LINE_RE.search(ln):
                     continue
                 if ln:
                     acc.append(ln)
@@ -308,15 +317,10 @@ def collect(driver) -> Dict[str, Any]:
     """
     driver.get(URL)
     wait_for_page(driver)
-    time.sleep(0.4)
 
     html = driver.page_source
     if SAVE_HTML:
-        try:
-            with open("qualys_page_source.html", "w", encoding="utf-8") as f:
-                f.write(html)
-        except Exception:
-            pass
+        save_page_source(html, "qualys_page_source.html")
 
     soup = BeautifulSoup(html, "lxml")
     items = _extract_items(soup)
@@ -339,12 +343,7 @@ def run():
 
         html = driver.page_source
         if SAVE_HTML:
-            try:
-                with open("qualys_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-                logger.debug("💾 HTML guardado en qualys_page_source.html")
-            except Exception as e:
-                logger.debug("No se pudo guardar HTML: %s", e)
+            save_page_source(html, "qualys_page_source.html")
 
         soup = BeautifulSoup(html, "lxml")
         items = _extract_items(soup)
@@ -352,8 +351,7 @@ def run():
 
         logger.info("===== QUALYS =====\n%s\n==================", resumen)
 
-        send_telegram(resumen)
-        send_teams(resumen)
+        notify_all(resumen)
 
     except Exception as e:
         logger.exception("ERROR: %s", e)
@@ -16,22 +16,22 @@ Reglas:
 import logging
 import os
 import re
-import time
 import html as htmlmod
 import json
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from urllib.parse import unquote
 from typing import List, Dict, Any, Tuple, Optional
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from dateutil import parser as dtparser
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 
 from common.browser import make_driver
-from common.notify import send_telegram, send_teams
-from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc
+from common.notify import notify_all, send_telegram, send_teams
+from common.utils import now_utc_str, now_utc_clean, collapse_ws, today_utc, save_page_source
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +66,13 @@ STATUS_MAP = {
 
 
 
+_READY_JS = """
+const text = ((document.body && document.body.innerText) || '').replace(/\\s+/g, ' ').toLowerCase();
+return text.includes('past incidents')
+    || text.includes('no incidents reported today')
+    || document.documentElement.outerHTML.includes('sspDataInfo');
+"""
+
 def wait_for_page(driver) -> None:
     """
     Considera la página lista cuando hay body y:
@@ -73,15 +80,14 @@ def wait_for_page(driver) -> None:
     - encontramos 'sspDataInfo' en el HTML (la fuente real de datos).
     """
     WebDriverWait(driver, 25).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-    for _ in range(60):
-        try:
-            body = driver.find_element(By.TAG_NAME, "body").text
-        except Exception:
-            body = ""
-        text = collapse_ws(body)
-        if ("past incidents" in text.lower()) or NO_INCIDENTS_TODAY_RE.search(text) or ("sspDataInfo" in driver.page_source):
-            return
-        time.sleep(0.25)
+    # Todo el chequeo se hace en el navegador: un round trip por sondeo en vez de
+    # body.text + page_source completo.
+    try:
+        WebDriverWait(driver, 15, poll_frequency=0.25).until(
+            lambda d: d.execute_script(_READY_JS)
+        )
+    except TimeoutException:
+        pass
 
 def extract_no_incidents_text(soup: BeautifulSoup) -> str:
     full = collapse_ws(soup.get_text(" ", strip=True))
@@ -108,9 +114,12 @@ def _extract_json_array_from_key(script_text: str, key: str) -> Optional[str]:
         i += 1
     return None
 
+_SCRIPTS_ONLY = SoupStrainer("script")
+
 def find_ssp_data_info_arrays(html: str) -> List[str]:
     out: List[str] = []
-    soup = BeautifulSoup(html, "lxml")
+    # Solo interesan los <script>: el resto del documento ni se construye
+    soup = BeautifulSoup(html, "lxml", parse_only=_SCRIPTS_ONLY)
     for sc in soup.find_all("script"):
         txt = sc.string or sc.get_text() or ""
         if "sspDataInfo" in txt:
@@ -185,16 +194,19 @@ def parse_ssp_records_for_product(html: str, product_name: str) -> List[Dict[str
 
 # ---------- Solo HOY ----------
 
-def is_today_utc(dtobj: datetime) -> bool:
-    now = today_utc()
-    return (dtobj.year, dtobj.month, dtobj.day) == (now.year, now.month, now.day)
+def is_today_utc(dtobj: datetime, today: Optional[date] = None) -> bool:
+    if today is None:
+        today = today_utc().date()
+    return dtobj.date() == today
 
 def summarize_today(records: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Agrupa por 'id' y toma la última actualización de HOY para cada incidente.
     Devuelve: { "count": N, "items": ["• Resolved — Title (HH:MM UTC)", ...] }
     """
-    today_updates = [r for r in records if is_today_utc(r["hisDate"])]
+    # La fecha de hoy se calcula una vez, no por registro
+    today = today_utc().date()
+    today_updates = [r for r in records if is_today_utc(r["hisDate"], today)]
     if not today_updates:
         return {"count": 0, "items": []}
 
@@ -255,11 +267,7 @@ def collect(driver) -> Dict[str, Any]:
         html = driver.page_source
 
         if SAVE_HTML:
-            try:
-                with open(f"trend_{site['slug']}_page_source.html", "w", encoding="utf-8") as f:
-                    f.write(html)
-            except Exception:
-                pass
+            save_page_source(html, f"trend_{site['slug']}_page_source.html")
 
         lines, cnt = build_section_lines(site["name"], html, site["product"])
         sections.append("\n".join(lines))
@@ -284,11 +292,7 @@ def run():
             wait_for_page(driver)
             html = driver.page_source
             if SAVE_HTML:
-                try:
-                    with open(f"trend_{site['slug']}_page_source.html", "w", encoding="utf-8") as f:
-                        f.write(html)
-                except Exception:
-                    pass
+                save_page_source(html, f"trend_{site['slug']}_page_source.html")
             lines, _ = build_section_lines(site["name"], html, site["product"])
             sections.append("\n".join(lines))
 
@@ -302,8 +306,7 @@ def run():
 
         logger.info("===== TREND MICRO (COMBINED) =====\n%s\n==================================", msg)
 
-        send_telegram(msg)
-        send_teams(msg)
+        notify_all(msg)
 
     except Exception as e:
         logger.exception("ERROR: %s", e)